@@ -3,7 +3,10 @@
 #include <Adafruit_ADS1X15.h>
 
 // =========================================================
-//      MODULE DISTRIBUTED FIRMWARE v2.8 (Full Bang-Bang)
+//      MODULE DISTRIBUTED FIRMWARE v2.9 (Full Bang-Bang)
+//      ASCII protocol v2.4 (';' batches) + binary frames (BIN1)
+//      Pot streaming: STREAM:ON:<port mask>:<hz> / STREAM:OFF
+//      Pot reads answer POTS:<port>:v1,v2,v3,v4 (port "D" = direct bus)
 // =========================================================
 
 #define MUX_ADDR 0x70  
@@ -21,6 +24,29 @@ Adafruit_ADS1115 ads;
 #define NUM_MOTORS 4
 #define NUM_POTS 4
 
+// Binary Framing: SYNC | LEN | OPCODE | PAYLOAD[LEN] | CRC8 (poly 0x07 over LEN..PAYLOAD)
+// Must match communication/binary_protocol.py
+#define FRAME_SYNC        0xA5
+#define FRAME_MAX_PAYLOAD 64
+#define FRAME_PORT_DIRECT 0xFF
+#define OP_SET_SERVOS     0x10
+#define OP_SET_MOTORS     0x11
+#define OP_READ_POTS      0x20
+#define OP_SCAN_I2C       0x21
+#define OP_CALIB_POTS     0x22
+
+// Frame being assembled. After a bad frame, parsing restarts at the next SYNC
+// byte (already buffered, or skipped to on the wire) instead of reading the
+// leftover bytes as an ASCII line.
+uint8_t frame_buf[FRAME_MAX_PAYLOAD + 4]; // SYNC, LEN, OPCODE, PAYLOAD, CRC
+uint8_t frame_fill = 0;
+bool frame_resync = false;
+
+// Channel tables indexed like the binary protocol
+// MOTOR1A/1B = TB6612 #1 A/B, MOTOR2A/2B = TB6612 #2 A/B: {pwm, in1, in2}
+const uint8_t MOTOR_PINS[NUM_MOTORS][3] = { {5, 3, 4}, {0, 1, 2}, {8, 10, 9}, {13, 11, 12} };
+const uint8_t SERVO_PINS[4] = { 6, 7, 14, 15 };
+
 // Servo Calibration
 #define SERVOMIN  150 // This is the 'minimum' pulse length count (approx 0 deg)
 #define SERVOMAX  600 // This is the 'maximum' pulse length count (approx 180 deg)
@@ -30,8 +56,24 @@ int16_t pot_offsets[NUM_POTS] = {0};
 bool pid_enabled = false;
 int current_bus = -99; 
 
+// Streaming State: every sweep reads all pots on the selected ports and pushes
+// one SPOTS:<seq>:<port>:v1,v2,v3,v4 line per port (port "D" = direct bus)
+#define STREAM_DIRECT_BIT 8
+#define STREAM_CONV_US    1300  // ADS1115 conversion at 860 SPS, plus margin
+bool streaming = false;
+int8_t stream_ports[9];
+uint8_t stream_count = 0;
+uint8_t stream_phase = 0;       // 0 = idle, 1 = start conversions, 2 = collect
+uint8_t stream_ch = 0;
+uint16_t stream_seq = 0;
+unsigned long stream_interval_us = 20000;
+unsigned long stream_next_us = 0;
+unsigned long stream_ready_us = 0;
+int16_t stream_vals[9][NUM_POTS];
+
 void setup() {
   Serial.begin(115200);
+  Serial.setTimeout(20); // Bounds how long a truncated frame can stall the loop
   Wire.begin();
   
   // Initialize default bus
@@ -55,6 +97,14 @@ void tcaselect(uint8_t i) {
 
 void setBus(int port) {
   if (port == current_bus) return;
+  selectBus(port);
+  delay(10);
+}
+
+// Switches without the settle delay: the TCA9548A applies the new channel on STOP
+// (used by the streaming sweep, which switches ports several hundred times a second)
+void selectBus(int port) {
+  if (port == current_bus) return;
 
   if (port == -1) {
     // Direct Mode
@@ -66,7 +116,6 @@ void setBus(int port) {
     tcaselect(port);
   }
   current_bus = port;
-  delay(10);
 }
 
 // ---------------------------------------------------------
@@ -74,7 +123,24 @@ void setBus(int port) {
 // ---------------------------------------------------------
 
 void loop() {
+  if (streaming) serviceStream();
+
   if (Serial.available()) {
+    // Drop what is left of a rejected frame, up to the next frame or line
+    if (frame_resync) {
+      while (Serial.available() && Serial.peek() != FRAME_SYNC) {
+        if (Serial.read() == '\n') break;
+      }
+      if (Serial.available() && Serial.peek() == FRAME_SYNC) frame_resync = false;
+      else return;
+    }
+
+    // Binary frames start with a sync byte that never begins an ASCII command
+    if (Serial.peek() == FRAME_SYNC) {
+      readFrame();
+      return;
+    }
+
     String input = Serial.readStringUntil('\n');
     input.trim();
     if (input.length() == 0) return;
@@ -91,13 +157,32 @@ void loop() {
       scanTopology();
       return;
     }
+    // Protocol negotiation: report everything this firmware understands
+    if (portStr == "SYS") {
+      if (cmdStr == "PROTO?") Serial.println("PROTO:ASCII2.4,BIN1,STREAM1");
+      return;
+    }
+    if (portStr == "STREAM") {
+      if (cmdStr.startsWith("ON:")) {
+        int sep = cmdStr.indexOf(':', 3);
+        startStream(cmdStr.substring(3, sep).toInt(), sep == -1 ? 50 : cmdStr.substring(sep + 1).toInt());
+      }
+      else stopStream();
+      return;
+    }
 
     // 2. Switch Bus
     if (portStr == "D") setBus(-1);
     else setBus(portStr.toInt());
 
-    // 3. Execute Command
-    processCommand(cmdStr);
+    // 3. Execute Commands (several ';'-separated commands share one bus switch)
+    int start = 0;
+    int sep;
+    while ((sep = cmdStr.indexOf(';', start)) != -1) {
+      processCommand(cmdStr.substring(start, sep));
+      start = sep + 1;
+    }
+    processCommand(cmdStr.substring(start));
   }
 }
 
@@ -144,6 +229,92 @@ void processCommand(String cmd) {
   }
 }
 
+// ---------------------------------------------------------
+//  BINARY FRAMES
+// ---------------------------------------------------------
+uint8_t crc8(uint8_t crc, uint8_t b) {
+  crc ^= b;
+  for (uint8_t i = 0; i < 8; i++) {
+    crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+  }
+  return crc;
+}
+
+void readFrame() {
+  while (true) {
+    // Read up to LEN first, then the rest of the frame
+    uint8_t need = 2;
+    if (frame_fill >= 2) {
+      if (frame_buf[1] > FRAME_MAX_PAYLOAD) {
+        Serial.println("ERR:LEN");
+        if (resyncFrame()) continue;
+        return;
+      }
+      need = frame_buf[1] + 4;
+    }
+    if (frame_fill < need) {
+      frame_fill += Serial.readBytes(frame_buf + frame_fill, need - frame_fill);
+      if (frame_fill < need) {
+        Serial.println("ERR:TIMEOUT");
+        frame_fill = 0;
+        return;
+      }
+      continue;
+    }
+
+    uint8_t len = frame_buf[1];
+    uint8_t crc = 0;
+    for (uint8_t i = 1; i < len + 3; i++) crc = crc8(crc, frame_buf[i]);
+    if (crc != frame_buf[len + 3]) {
+      Serial.println("ERR:CRC");
+      if (resyncFrame()) continue;
+      return;
+    }
+    frame_fill = 0;
+    if (len < 1) return;
+
+    // Every opcode starts with the target port
+    uint8_t *p = frame_buf + 3;
+    setBus(p[0] == FRAME_PORT_DIRECT ? -1 : p[0]);
+    processFrame(frame_buf[2], p + 1, len - 1);
+    return;
+  }
+}
+
+// Drops the rejected SYNC byte and restarts at the next SYNC already read.
+// Returns false if there is none; loop() then skips input up to the next one.
+bool resyncFrame() {
+  for (uint8_t i = 1; i < frame_fill; i++) {
+    if (frame_buf[i] == FRAME_SYNC) {
+      memmove(frame_buf, frame_buf + i, frame_fill - i);
+      frame_fill -= i;
+      return true;
+    }
+  }
+  frame_fill = 0;
+  frame_resync = true;
+  return false;
+}
+
+void processFrame(uint8_t op, uint8_t *p, uint8_t len) {
+  if (op == OP_SET_SERVOS || op == OP_SET_MOTORS) {
+    // count, then (channel, value) pairs - one bus switch for the whole batch
+    if (len < 1 || len < 1 + 2 * p[0]) return;
+    for (uint8_t i = 0; i < p[0]; i++) {
+      uint8_t ch = p[1 + 2 * i];
+      if (op == OP_SET_SERVOS) {
+        if (ch < 4) setServoPin(SERVO_PINS[ch], p[2 + 2 * i]);
+      } else {
+        int8_t duty = (int8_t)p[2 + 2 * i];
+        if (ch < NUM_MOTORS) setMotorPins(ch, abs(duty), duty >= 0);
+      }
+    }
+  }
+  else if (op == OP_READ_POTS) readPots();
+  else if (op == OP_SCAN_I2C) scanCurrentBus();
+  else if (op == OP_CALIB_POTS) calibratePots();
+}
+
 // ---------------------------------------------------------
 //  READING
 // ---------------------------------------------------------
@@ -156,6 +327,9 @@ void readPots() {
   }
   
   Serial.print("POTS:");
+  if (current_bus < 0) Serial.print("D");
+  else Serial.print(current_bus);
+  Serial.print(":");
   for (int i=0; i<NUM_POTS; i++) {
     Serial.print(pots[i]);
     if (i < NUM_POTS-1) Serial.print(",");
@@ -177,26 +351,97 @@ void scanCurrentBus() {
   Serial.println();
 }
 
+// ---------------------------------------------------------
+//  STREAMING
+// ---------------------------------------------------------
+void startStream(int mask, int hz) {
+  stream_count = 0;
+  for (uint8_t p = 0; p <= STREAM_DIRECT_BIT; p++) {
+    if (mask & (1 << p)) stream_ports[stream_count++] = (p == STREAM_DIRECT_BIT) ? -1 : p;
+  }
+  if (stream_count == 0) { stopStream(); return; }
+
+  hz = constrain(hz, 1, 200);
+  stream_interval_us = 1000000UL / hz;
+  ads.begin();
+  ads.setDataRate(RATE_ADS1115_860SPS);
+  streaming = true;
+  stream_phase = 0;
+  stream_next_us = micros();
+  Serial.println("STREAM:ON");
+}
+
+void stopStream() {
+  streaming = false;
+  ads.setDataRate(RATE_ADS1115_128SPS);
+  Serial.println("STREAM:OFF");
+}
+
+// Non-blocking: the ADS1115s behind different mux ports convert in parallel,
+// so each channel is started on every port, then collected after one conversion time.
+// Commands keep being served between the steps.
+void serviceStream() {
+  unsigned long now = micros();
+
+  if (stream_phase == 0) {
+    if ((long)(now - stream_next_us) < 0) return;
+    stream_next_us += stream_interval_us;
+    // Fell behind (e.g. a slow command): skip ahead instead of bursting
+    if ((long)(now - stream_next_us) > 0) stream_next_us = now + stream_interval_us;
+    stream_ch = 0;
+    stream_phase = 1;
+  }
+
+  if (stream_phase == 1) {
+    for (uint8_t i = 0; i < stream_count; i++) {
+      selectBus(stream_ports[i]);
+      ads.startADCReading(MUX_BY_CHANNEL[stream_ch], false);
+    }
+    stream_ready_us = micros() + STREAM_CONV_US;
+    stream_phase = 2;
+    return;
+  }
+
+  if ((long)(now - stream_ready_us) < 0) return;
+  for (uint8_t i = 0; i < stream_count; i++) {
+    selectBus(stream_ports[i]);
+    stream_vals[i][stream_ch] = ads.getLastConversionResults() - pot_offsets[stream_ch];
+  }
+  if (++stream_ch < NUM_POTS) {
+    stream_phase = 1;
+    return;
+  }
+
+  for (uint8_t i = 0; i < stream_count; i++) {
+    Serial.print("SPOTS:");
+    Serial.print(stream_seq);
+    Serial.print(":");
+    if (stream_ports[i] < 0) Serial.print("D");
+    else Serial.print(stream_ports[i]);
+    Serial.print(":");
+    for (int c = 0; c < NUM_POTS; c++) {
+      Serial.print(stream_vals[i][c]);
+      if (c < NUM_POTS-1) Serial.print(",");
+    }
+    Serial.println();
+  }
+  stream_seq++;
+  stream_phase = 0;
+}
+
 // ---------------------------------------------------------
 //  PIN MAPPING
 // ---------------------------------------------------------
-void getMotorChannels(String motor, int &pwm_ch, int &in1_ch, int &in2_ch) {
+int motorIndex(String motor) {
   // MOTOR 1 = TB6612 #1 Output A (Pins 5, 3, 4)
-  if (motor == "MOTOR1" || motor == "MOTOR1A") { 
-    pwm_ch=5; in1_ch=3; in2_ch=4; 
-  }
+  if (motor == "MOTOR1" || motor == "MOTOR1A") return 0;
   // MOTOR 2 = TB6612 #1 Output B (Pins 0, 1, 2)
-  else if (motor == "MOTOR2" || motor == "MOTOR1B") { 
-    pwm_ch=0; in1_ch=1; in2_ch=2; 
-  } 
+  if (motor == "MOTOR2" || motor == "MOTOR1B") return 1;
   // MOTOR 3 = TB6612 #2 Output A (Pins 8, 10, 9)
-  else if (motor == "MOTOR3" || motor == "MOTOR2A") { 
-    pwm_ch=8; in1_ch=10; in2_ch=9; 
-  }
+  if (motor == "MOTOR3" || motor == "MOTOR2A") return 2;
   // MOTOR 4 = TB6612 #2 Output B (Pins 13, 11, 12)
-  else if (motor == "MOTOR4" || motor == "MOTOR2B") { 
-    pwm_ch=13; in1_ch=11; in2_ch=12; 
-  } 
+  if (motor == "MOTOR4" || motor == "MOTOR2B") return 3;
+  return -1;
 }
 
 void testMotor(String motor, bool fwd, int pct) {
@@ -205,10 +450,16 @@ void testMotor(String motor, bool fwd, int pct) {
   setMotorDuty(motor, 0, fwd);
 }
 
-// MODIFIED FOR BANG-BANG CONTROL (NO JITTER)
 void setMotorDuty(String motor, int pct, bool fwd) {
-  int pwm_ch, in1_ch, in2_ch;
-  getMotorChannels(motor, pwm_ch, in1_ch, in2_ch);
+  int idx = motorIndex(motor);
+  if (idx >= 0) setMotorPins(idx, pct, fwd);
+}
+
+// MODIFIED FOR BANG-BANG CONTROL (NO JITTER)
+void setMotorPins(uint8_t idx, int pct, bool fwd) {
+  uint8_t pwm_ch = MOTOR_PINS[idx][0];
+  uint8_t in1_ch = MOTOR_PINS[idx][1];
+  uint8_t in2_ch = MOTOR_PINS[idx][2];
   
   if (pct == 0) {
     // HARD STOP
@@ -235,22 +486,21 @@ void setMotorDuty(String motor, int pct, bool fwd) {
 
 // NEW SERVO FUNCTION
 void setServoAngle(String servoName, int angle) {
-  int pin = -1;
   // Standard IvanModule Pinout
-  if (servoName == "SERVO1") pin = 6;
-  else if (servoName == "SERVO2") pin = 7;
-  else if (servoName == "SERVO3") pin = 14;
-  else if (servoName == "SERVO4") pin = 15;
+  if (servoName == "SERVO1") setServoPin(SERVO_PINS[0], angle);
+  else if (servoName == "SERVO2") setServoPin(SERVO_PINS[1], angle);
+  else if (servoName == "SERVO3") setServoPin(SERVO_PINS[2], angle);
+  else if (servoName == "SERVO4") setServoPin(SERVO_PINS[3], angle);
+}
+
+void setServoPin(uint8_t pin, int angle) {
+  // Safety Constrain
+  if (angle < 0) angle = 0;
+  if (angle > 180) angle = 180;
   
-  if (pin != -1) {
-    // Safety Constrain
-    if (angle < 0) angle = 0;
-    if (angle > 180) angle = 180;
-    
-    // Map Angle to Pulse Width
-    int pulse = map(angle, 0, 180, SERVOMIN, SERVOMAX);
-    pwm.setPWM(pin, 0, pulse);
-  }
+  // Map Angle to Pulse Width
+  int pulse = map(angle, 0, 180, SERVOMIN, SERVOMAX);
+  pwm.setPWM(pin, 0, pulse);
 }
 
 void calibratePots() {
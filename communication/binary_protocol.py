@@ -0,0 +1,125 @@
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger('inmoov_v13')
+
+def _crc8_table(poly=0x07):
+    table = []
+    for b in range(256):
+        c = b
+        for _ in range(8):
+            c = ((c << 1) ^ poly) & 0xFF if c & 0x80 else (c << 1) & 0xFF
+        table.append(c)
+    return table
+
+_CRC8_TABLE = _crc8_table()
+
+class BinaryProtocol:
+    """
+    Compact framed protocol (firmware v2.9+), negotiated next to ASCII v2.3.
+
+    Frame: SYNC(0xA5) | LEN | OPCODE | PAYLOAD[LEN] | CRC8
+    CRC-8 (poly 0x07, init 0) covers LEN, OPCODE and PAYLOAD.
+    Ports are mux ports 0-7, or DIRECT_PORT for the bus without the mux.
+
+    SET_SERVOS  port, count, count x (servo index, angle 0-180)
+    SET_MOTORS  port, count, count x (motor index, duty -100..100 as int8)
+    READ_POTS / SCAN_I2C / CALIB_POTS  port
+    Replies stay ASCII lines (POTS:..., I2C_SCAN:...); batched SET frames
+    are not acknowledged.
+    """
+    VERSION = 1
+    SYNC = 0xA5
+    MAX_PAYLOAD = 64
+    DIRECT_PORT = 0xFF
+
+    OP_SET_SERVOS = 0x10
+    OP_SET_MOTORS = 0x11
+    OP_READ_POTS = 0x20
+    OP_SCAN_I2C = 0x21
+    OP_CALIB_POTS = 0x22
+
+    # Channel indices shared with the firmware pin tables
+    SERVO_INDEX = {'SERVO1': 0, 'SERVO2': 1, 'SERVO3': 2, 'SERVO4': 3}
+    MOTOR_INDEX = {'MOTOR1A': 0, 'MOTOR1': 0, 'MOTOR1B': 1, 'MOTOR2': 1,
+                   'MOTOR2A': 2, 'MOTOR3': 2, 'MOTOR2B': 3, 'MOTOR4': 3}
+
+    @staticmethod
+    def crc8(data, crc=0) -> int:
+        for b in data:
+            crc = _CRC8_TABLE[crc ^ b]
+        return crc
+
+    @staticmethod
+    def encode_frame(opcode: int, payload: bytes = b"") -> bytes:
+        if len(payload) > BinaryProtocol.MAX_PAYLOAD:
+            raise ValueError(f"Payload too long: {len(payload)} > {BinaryProtocol.MAX_PAYLOAD}")
+        body = bytes((len(payload), opcode)) + payload
+        return bytes((BinaryProtocol.SYNC,)) + body + bytes((BinaryProtocol.crc8(body),))
+
+    @staticmethod
+    def port_byte(mux_port) -> int:
+        if mux_port is None or mux_port == "D" or int(mux_port) < 0: return BinaryProtocol.DIRECT_PORT
+        return int(mux_port)
+
+    @staticmethod
+    def encode_servos(mux_port, servos: Iterable[Tuple[str, float]]) -> Optional[bytes]:
+        """servos: [(name, angle)] on one mux port -> one SET_SERVOS frame."""
+        try:
+            items = [(BinaryProtocol.SERVO_INDEX[name], int(max(0, min(180, angle)))) for name, angle in servos]
+            payload = bytes((BinaryProtocol.port_byte(mux_port), len(items))) + bytes(b for item in items for b in item)
+            return BinaryProtocol.encode_frame(BinaryProtocol.OP_SET_SERVOS, payload)
+        except (KeyError, ValueError) as e:
+            logger.error(f"Servo frame encoding error: {e}")
+            return None
+
+    @staticmethod
+    def encode_motors(mux_port, motors: Iterable[Tuple[str, float]]) -> Optional[bytes]:
+        """motors: [(name, signed duty %)] on one mux port -> one SET_MOTORS frame."""
+        try:
+            items = [(BinaryProtocol.MOTOR_INDEX[name], int(max(-100, min(100, speed))) & 0xFF) for name, speed in motors]
+            payload = bytes((BinaryProtocol.port_byte(mux_port), len(items))) + bytes(b for item in items for b in item)
+            return BinaryProtocol.encode_frame(BinaryProtocol.OP_SET_MOTORS, payload)
+        except (KeyError, ValueError) as e:
+            logger.error(f"Motor frame encoding error: {e}")
+            return None
+
+    @staticmethod
+    def encode_port_command(opcode: int, mux_port) -> bytes:
+        return BinaryProtocol.encode_frame(opcode, bytes((BinaryProtocol.port_byte(mux_port),)))
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for BinaryProtocol frames.
+    feed() accepts arbitrary chunks and returns the complete, CRC-valid
+    (opcode, payload) frames; garbage before a sync byte is skipped.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        self.buffer += data
+        frames = []
+        buf = self.buffer
+        while True:
+            start = buf.find(BinaryProtocol.SYNC)
+            if start < 0:
+                buf.clear()
+                break
+            if start: del buf[:start]
+            if len(buf) < 2: break
+            length = buf[1]
+            if length > BinaryProtocol.MAX_PAYLOAD:
+                del buf[:1]
+                continue
+            end = 4 + length
+            if len(buf) < end: break
+            if BinaryProtocol.crc8(buf[1:end - 1]) == buf[end - 1]:
+                frames.append((buf[2], bytes(buf[3:end - 1])))
+                del buf[:end]
+            else:
+                self.crc_errors += 1
+                del buf[:1]
+        return frames
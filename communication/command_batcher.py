@@ -0,0 +1,85 @@
+import logging
+from PyQt6.QtCore import QObject, QTimer
+
+logger = logging.getLogger('inmoov_v13')
+
+class CommandBatch:
+    """
+    Actuator updates grouped by mux port, sent as one command per port and
+    kind carrying every pending channel (one per channel if the firmware
+    did not negotiate batches). Plain object with no Qt, so a producer
+    thread (the control loop) can keep its own.
+    """
+    def __init__(self):
+        self.pending = {}   # {(mux_port, "servo"|"motor"): {name: value}}
+
+        # Stats
+        self.updates = 0
+        self.commands = 0
+
+    def add(self, hw_config, kind, value):
+        key = (hw_config.get('mux_port', 0), kind)
+        default = 'SERVO1' if kind == "servo" else 'MOTOR1A'
+        self.pending.setdefault(key, {})[hw_config.get('name', default)] = value
+        self.updates += 1
+
+    def send(self, serial_manager):
+        """Translates and queues every pending update, one command per (port, kind)."""
+        if not self.pending: return
+        pending, self.pending = self.pending, {}
+
+        translator = serial_manager.protocol_translator
+        batches = translator.batches()
+        for (port, kind), channels in pending.items():
+            items = list(channels.items())
+            translate = translator.translate_servo_batch if kind == "servo" else translator.translate_motor_batch
+            for group in ([items] if batches else [[item] for item in items]):
+                cmd = translate(port, group)
+                if cmd:
+                    serial_manager.send_raw(cmd)
+                    self.commands += 1
+
+    def clear(self):
+        self.pending.clear()
+
+    def stats(self):
+        return {"updates": self.updates, "commands": self.commands}
+
+
+class CommandBatcher(QObject):
+    """
+    GUI-thread batching between producers (sliders) and the serial queue.
+    Updates queued from the same event-loop pass are flushed together, so
+    the firmware switches the TCA9548A once per port instead of once per
+    joint. Other threads keep their own CommandBatch instead.
+    """
+    def __init__(self, serial_manager):
+        super().__init__()
+        self.serial = serial_manager
+        self.batch = CommandBatch()
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def queue_servo(self, hw_config, angle):
+        self._queue(hw_config, "servo", angle)
+
+    def queue_motor(self, hw_config, speed):
+        self._queue(hw_config, "motor", speed)
+
+    def _queue(self, hw_config, kind, value):
+        self.batch.add(hw_config, kind, value)
+        if not self.timer.isActive(): self.timer.start(0)
+
+    def flush(self):
+        """Sends every pending update, one command per (port, kind)."""
+        self.timer.stop()
+        self.batch.send(self.serial)
+
+    def clear(self):
+        self.timer.stop()
+        self.batch.clear()
+
+    def stats(self):
+        return self.batch.stats()
@@ -1,16 +1,27 @@
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, Union
+from .binary_protocol import BinaryProtocol
 
 logger = logging.getLogger('inmoov_v13')
 
 class ProtocolTranslator:
     """
     Translates GUI actuator commands to Arduino distributed protocol v2.3.
+    Once the firmware has negotiated binary framing (see BinaryProtocol),
+    actuator and port commands are returned as frames (bytes) instead.
+    ';' batches of several channels need ASCII v2.4 (ascii_batches).
     """
 
     def __init__(self):
         # Mappings stored for reference
         self.servo_mappings = {'SERVO1': 6, 'SERVO2': 7, 'SERVO3': 14, 'SERVO4': 15}
+        self.binary = False
+        self.ascii_batches = False  # firmware runs PORT:CMD;CMD lines (ASCII v2.4+)
+        self.stream = False         # firmware pushes SPOTS sweeps (STREAM1)
+
+    def translate_protocol_query(self) -> str:
+        """Asks the firmware for its protocols; v2.9+ answers PROTO:ASCII2.4,BIN1,STREAM1."""
+        return "SYS:PROTO?"
 
     def translate_servo_command(self, actuator_id: int, angle: float, config: Dict[str, Any]) -> Optional[str]:
         """
@@ -44,27 +55,133 @@ class ProtocolTranslator:
             logger.error(f"Motor translation error ID {actuator_id}: {e}")
             return None
 
+    def batches(self) -> bool:
+        """True if one command may carry several channels (binary or ASCII v2.4)."""
+        return self.binary or self.ascii_batches
+
+    def translate_servo_batch(self, mux_port, servos) -> Optional[Union[str, bytes]]:
+        """
+        All servo updates for one mux port in a single command.
+        servos: [(name, angle)]. Format: PORT:SET_SERVOx:ANGLE;SET_SERVOy:ANGLE
+        Several servos only if batches() is True.
+        """
+        try:
+            servos = [(name, int(max(0, min(180, angle)))) for name, angle in servos]
+            if self.binary:
+                return BinaryProtocol.encode_servos(mux_port, servos)
+            return f"{mux_port}:" + ";".join(f"SET_{name}:{angle}" for name, angle in servos)
+        except Exception as e:
+            logger.error(f"Servo batch translation error port {mux_port}: {e}")
+            return None
+
+    def translate_motor_batch(self, mux_port, motors) -> Optional[Union[str, bytes]]:
+        """
+        All motor updates for one mux port in a single command.
+        motors: [(name, signed speed)]. Format: PORT:TEST_MOTORx_DIR:DUTY;...
+        Several motors only if batches() is True.
+        """
+        try:
+            if self.binary:
+                return BinaryProtocol.encode_motors(mux_port, motors)
+            parts = []
+            for name, speed in motors:
+                direction = "FWD" if speed >= 0 else "REV"
+                parts.append(f"TEST_{name}_{direction}:{max(0, min(100, int(abs(speed))))}")
+            return f"{mux_port}:" + ";".join(parts)
+        except Exception as e:
+            logger.error(f"Motor batch translation error port {mux_port}: {e}")
+            return None
+
     def translate_scan(self):
         return "SCAN:SYSTEM"
 
+    def translate_stream(self, enable, ports=(), rate_hz=50):
+        """
+        Firmware-pushed pot frames for the given mux ports (None/"D" = direct bus).
+        Format: STREAM:ON:<port bitmask>:<sweeps per second> | STREAM:OFF
+        """
+        if not enable: return "STREAM:OFF"
+        mask = 0
+        for port in ports:
+            mask |= 1 << (8 if port is None or port == "D" or int(port) < 0 else int(port))
+        return f"STREAM:ON:{mask}:{int(rate_hz)}"
+
     def translate_i2c_scan(self, mux_port):
+        if self.binary:
+            return BinaryProtocol.encode_port_command(BinaryProtocol.OP_SCAN_I2C, mux_port)
         prefix = str(mux_port) if mux_port is not None else "D"
         return f"{prefix}:SCAN_I2C"
 
     def translate_pots_read(self, mux_port=None):
+        if self.binary:
+            return BinaryProtocol.encode_port_command(BinaryProtocol.OP_READ_POTS, mux_port)
         prefix = str(mux_port) if mux_port is not None else "D"
         return f"{prefix}:TEST_POTS"
 
+    DIAGNOSTIC_COMMANDS = ("TEST_POTS", "SCAN_I2C")
+    DIAGNOSTIC_OPCODES = (BinaryProtocol.OP_READ_POTS, BinaryProtocol.OP_SCAN_I2C)
+
+    def command_channels(self, cmd: Union[str, bytes]) -> Tuple[Optional[tuple], bool]:
+        """
+        What a command sets, for send coalescing: (channels, is_diagnostic).
+        channels has one key per actuator (a ';' batch or SET frame lists
+        several); a newer command setting the same channel supersedes it.
+        STREAM:ON/OFF share one channel. channels is None for commands that
+        must all go out.
+        """
+        if isinstance(cmd, bytes):
+            if len(cmd) < 4: return None, False
+            op, port = cmd[2], cmd[3]
+            if op in (BinaryProtocol.OP_SET_SERVOS, BinaryProtocol.OP_SET_MOTORS):
+                return tuple((op, port, idx) for idx in cmd[5:-1:2]), False
+            return ((op, port),), op in self.DIAGNOSTIC_OPCODES
+
+        port, sep, body = cmd.strip().partition(':')
+        if not sep: return None, False
+        if port == "STREAM": return (("STREAM",),), False
+        names = [self._channel_name(part) for part in body.split(';')]
+        return tuple((port, name) for name in names), len(names) == 1 and names[0] in self.DIAGNOSTIC_COMMANDS
+
+    @staticmethod
+    def _channel_name(part):
+        name = part.rsplit(':', 1)[0] if ':' in part else part
+        if name.endswith(("_FWD", "_REV")): name = name[:-4]  # direction is part of the value
+        return name
+
+    def drop_channels(self, cmd: Union[str, bytes], channels) -> Optional[Union[str, bytes]]:
+        """cmd without the given channels (see command_channels), or None if it cannot be split."""
+        if isinstance(cmd, bytes):
+            if len(cmd) < 6 or cmd[2] not in (BinaryProtocol.OP_SET_SERVOS, BinaryProtocol.OP_SET_MOTORS): return None
+            op, port = cmd[2], cmd[3]
+            pairs = [cmd[i:i + 2] for i in range(5, len(cmd) - 1, 2) if (op, port, cmd[i]) not in channels]
+            return BinaryProtocol.encode_frame(op, bytes((port, len(pairs))) + b"".join(pairs))
+
+        port, sep, body = cmd.strip().partition(':')
+        if not sep or port == "STREAM": return None
+        parts = [part for part in body.split(';') if (port, self._channel_name(part)) not in channels]
+        return f"{port}:" + ";".join(parts) + "\n"
+
+    def pot_poll_port(self, cmd: Union[str, bytes]):
+        """Mux port a pot read is addressed to ("D" = direct), or None if cmd is not one."""
+        if isinstance(cmd, bytes):
+            if len(cmd) > 3 and cmd[2] == BinaryProtocol.OP_READ_POTS:
+                return "D" if cmd[3] == BinaryProtocol.DIRECT_PORT else cmd[3]
+            return None
+        port, sep, body = cmd.strip().partition(':')
+        return port if sep and body == "TEST_POTS" else None
+
     def parse_telemetry(self, line: str) -> Dict[str, Any]:
         telemetry = {}
         try:
             if line.startswith("POTS:"):
-                values = line[5:].split(',')
+                values = line[5:].rpartition(':')[2].split(',')
                 telemetry['pots'] = [int(v) for v in values if v.strip().lstrip('-').isdigit()]
             elif line.startswith("I2C_SCAN:"):
                 telemetry['i2c_addresses'] = [addr.strip() for addr in line.split(':')[1].split(',') if addr.strip()]
             elif line.startswith("FOUND:"):
                 telemetry['topology'] = line.split(':')[1].strip()
+            elif line.startswith("PROTO:"):
+                telemetry['protocol'] = line[6:].strip()
             elif line == "CMD_OK":
                 telemetry['command_ack'] = True
         except Exception as e:
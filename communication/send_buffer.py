@@ -0,0 +1,113 @@
+import threading
+import itertools
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger('inmoov_v12')
+
+class SendBuffer:
+    """
+    Thread-safe outgoing command buffer (latest value wins).
+
+    A command is put with the channels it sets (actuators, or one key for
+    commands like STREAM that replace each other). A newer command takes
+    those channels over from every pending one: an older command left with
+    none is dropped, one left with some is cut down with trim(cmd, channels)
+    if given, and the new command goes to the back of the line. A slider
+    drag so leaves one up-to-date command per actuator, and the newest value
+    always goes out last. Control commands are always sent before
+    diagnostics (pot polls, I2C scans). When full, the oldest diagnostic is
+    dropped first, then the new command.
+    """
+    CONTROL = 0
+    DIAGNOSTIC = 1
+
+    def __init__(self, max_size=256, trim=None):
+        self.max_size = max_size
+        self.trim = trim
+        self._queues = (OrderedDict(), OrderedDict())  # indexed by priority: {entry id: [cmd, channels]}
+        self._owner = {}  # channel -> (priority, entry id) of the pending command that sets it
+        self._cond = threading.Condition()
+        self._ids = itertools.count()
+
+        # Stats
+        self.queued = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def put(self, cmd, channels=None, priority=CONTROL):
+        """Queues cmd behind everything pending. Returns False if it had to be dropped."""
+        with self._cond:
+            channels = frozenset(channels) if channels else frozenset()
+            if len(self) >= self.max_size and not self._replaces_entry(channels):
+                diag = self._queues[self.DIAGNOSTIC]
+                if not diag:
+                    self.dropped += 1
+                    return False
+                self._release(diag.popitem(last=False)[1])
+                self.dropped += 1
+            self._supersede(channels)
+
+            entry = next(self._ids)
+            self._queues[priority][entry] = [cmd, channels]
+            for ch in channels: self._owner[ch] = (priority, entry)
+            self.queued += 1
+            self._cond.notify()
+            return True
+
+    def _replaces_entry(self, channels):
+        """True if a pending command sets nothing but these channels (so putting frees its slot)."""
+        owners = {self._owner[ch] for ch in channels if ch in self._owner}
+        return any(self._queues[p][e][1] <= channels for p, e in owners)
+
+    def _supersede(self, channels):
+        """Takes channels away from the pending commands that set them."""
+        taken = {}
+        for ch in channels:
+            owner = self._owner.pop(ch, None)
+            if owner is not None: taken.setdefault(owner, set()).add(ch)
+        for (priority, entry), gone in taken.items():
+            q = self._queues[priority]
+            cmd, left = q[entry]
+            left = left - gone
+            if not left:
+                del q[entry]
+                self.coalesced += 1
+            else:
+                trimmed = self.trim(cmd, gone) if self.trim else None
+                q[entry] = [trimmed if trimmed is not None else cmd, left]
+
+    def _release(self, item):
+        for ch in item[1]: self._owner.pop(ch, None)
+
+    def pop(self, timeout=0):
+        """Next command by priority, waiting up to timeout seconds. None if empty."""
+        with self._cond:
+            if timeout and not len(self):
+                self._cond.wait(timeout)
+            for q in self._queues:
+                if q:
+                    item = q.popitem(last=False)[1]
+                    self._release(item)
+                    self.sent += 1
+                    return item[0]
+            return None
+
+    def wake(self):
+        """Releases a blocked pop() (used on shutdown)."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def clear(self):
+        with self._cond:
+            for q in self._queues: q.clear()
+            self._owner.clear()
+
+    def __len__(self):
+        return len(self._queues[0]) + len(self._queues[1])
+
+    def stats(self):
+        with self._cond:
+            return {"pending": len(self), "queued": self.queued, "sent": self.sent,
+                    "coalesced": self.coalesced, "dropped": self.dropped}
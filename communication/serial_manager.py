@@ -1,11 +1,15 @@
 import serial
 import serial.tools.list_ports
 import threading
-import queue
+import time
 import logging
+from collections import deque
 from PyQt6.QtCore import QObject, pyqtSignal
 from .telemetry_parser import TelemetryParser
 from .protocol_translator import ProtocolTranslator
+from .binary_protocol import BinaryProtocol
+from .command_batcher import CommandBatcher
+from .send_buffer import SendBuffer
 
 logger = logging.getLogger('inmoov_v12')
 
@@ -19,28 +23,45 @@ class SerialManager(QObject):
     topology_updated = pyqtSignal(str)    # topology info
     command_acknowledged = pyqtSignal(str)# command type
     raw_log_received = pyqtSignal(str)    # For debugging console
+    protocol_negotiated = pyqtSignal(str) # "BIN1" or "ASCII"
+    snapshot_updated = pyqtSignal(int)    # streamed sweep: frame index into telemetry_parser.ring
+
+    POT_POLL_TIMEOUT_NS = 500_000_000     # a pot read unanswered this long is assumed lost
 
     def __init__(self):
         super().__init__()  # Initialize QObject base class
         self.ser = None
         self.connected = False
-        self._send_q = queue.Queue()
+        self.protocol_translator = ProtocolTranslator()
+        # Per-actuator latest value wins, control before diagnostics
+        self._send_buf = SendBuffer(trim=self.protocol_translator.drop_channels)
         self._stop_event = threading.Event()
-        self._worker = None
+        self._threads = []
+        self._pot_polls = deque()  # (port, write time ns) of pot reads not yet answered, in order
+        self._pot_lock = threading.Lock()
+        self._stream_resets = deque()  # port lists of streams started, for the reader thread to apply
         self.telemetry_parser = TelemetryParser()
-        self.protocol_translator = ProtocolTranslator()
+        self.batcher = CommandBatcher(self)  # Per-port batching for actuator updates
+        self.prefer_binary = True  # Use binary frames when the firmware offers them
 
     def connect(self, port):
         """Connect to serial port"""
         try:
-            # Reduced timeout slightly for snappier reading
-            self.ser = serial.Serial(port, 115200, timeout=0.05)
+            # Reads block on data; the timeout only bounds how long shutdown waits
+            self.ser = serial.Serial(port, 115200, timeout=0.2)
             self.connected = True
             self._stop_event.clear()
-            # start worker thread to handle reads/writes
-            self._worker = threading.Thread(target=self._worker_loop, daemon=True)
-            self._worker.start()
+            # Separate reader/writer threads so neither waits on the other
+            self._threads = [threading.Thread(target=self._reader_loop, daemon=True),
+                             threading.Thread(target=self._writer_loop, daemon=True)]
+            for t in self._threads: t.start()
             logger.info(f"Connected to {port}")
+            # Firmware without PROTO support ignores the query and we stay on
+            # ASCII v2.3, one command per channel
+            self.protocol_translator.binary = False
+            self.protocol_translator.ascii_batches = False
+            self.protocol_translator.stream = False
+            self.send_raw(self.protocol_translator.translate_protocol_query())
             return True
         except Exception as e:
             logger.error(f"Connection error: {e}")
@@ -51,6 +72,7 @@ class SerialManager(QObject):
         self.connected = False
         try:
             self._stop_event.set()
+            self._send_buf.wake()
             if self.ser:
                 # Force close logic
                 try:
@@ -60,31 +82,39 @@ class SerialManager(QObject):
                     pass
                 self.ser.close()
             
-            if self._worker and self._worker.is_alive():
-                self._worker.join(timeout=0.5)
+            for t in self._threads:
+                if t.is_alive(): t.join(timeout=0.5)
         except Exception as e:
             logger.debug(f"Disconnect cleanup error: {e}")
         finally:
             self.ser = None
+            self.batcher.clear()
+            self._send_buf.clear()
+            with self._pot_lock: self._pot_polls.clear()
+            self.protocol_translator.binary = False
+            self.protocol_translator.ascii_batches = False
+            self.protocol_translator.stream = False
 
     def send(self, board, pin, val):
         """Send command using old protocol format (Legacy support)"""
         if self.connected:
-            msg = f"<{board}:{pin}:{val}>\n"
-            try:
-                self._send_q.put_nowait(msg)
-            except queue.Full:
-                logger.warning('Send queue full, dropping message')
+            self._enqueue(f"<{board}:{pin}:{val}>\n")
 
     def send_raw(self, command):
-        """Send raw command string"""
+        """Send raw command string, or a binary frame (bytes) as-is"""
         if self.connected:
-            try:
-                # Ensure newline
-                cmd = command.strip() + "\n"
-                self._send_q.put_nowait(cmd)
-            except queue.Full:
-                logger.warning('Send queue full, dropping message')
+            # Ensure newline
+            self._enqueue(command if isinstance(command, bytes) else command.strip() + "\n")
+
+    def _enqueue(self, cmd):
+        channels, diagnostic = self.protocol_translator.command_channels(cmd)
+        priority = SendBuffer.DIAGNOSTIC if diagnostic else SendBuffer.CONTROL
+        if not self._send_buf.put(cmd, channels, priority):
+            logger.warning('Send queue full, dropping message')
+
+    def send_stats(self):
+        """Outgoing buffer counters: pending, queued, sent, coalesced, dropped."""
+        return self._send_buf.stats()
 
     def send_actuator_command(self, actuator_id: int, value: float,
                              actuator_config: dict):
@@ -103,64 +133,144 @@ class SerialManager(QObject):
         except Exception as e:
             logger.error(f"Error sending actuator command: {e}")
 
-    def enable_stream(self, enable):
+    def enable_stream(self, enable, ports=(), rate_hz=50):
         """
-        Enable/disable telemetry streaming.
-        Note: Firmware v2.2 typically requires polling via TEST_POTS, 
-        but we keep this in case future firmware supports auto-streaming.
+        Enable/disable telemetry streaming (firmware v2.9+).
+        The firmware sweeps the given mux ports rate_hz times per second;
+        each complete sweep is emitted as snapshot_updated.
+        Returns False if the firmware did not negotiate STREAM; poll with
+        TEST_POTS then.
         """
-        if self.connected:
-            cmd = "STREAM_ON\n" if enable else "STREAM_OFF\n"
-            try:
-                self._send_q.put_nowait(cmd)
-            except queue.Full:
-                logger.debug('Stream command queue full')
+        if not self.connected or not self.protocol_translator.stream: return False
+        # Reassembly state belongs to the reader thread, which resets it before the next chunk
+        if enable: self._stream_resets.append(list(ports))
+        self.send_raw(self.protocol_translator.translate_stream(enable, ports, rate_hz))
+        return True
+
+    def _on_protocol(self, capabilities):
+        """
+        Switches to binary frames if the firmware reported a compatible
+        version, and to ';' batches if its ASCII protocol is v2.4 or later.
+        Streaming is used only if STREAM1 is listed.
+        """
+        caps = [c.strip() for c in capabilities.split(',')]
+        binary = self.prefer_binary and f"BIN{BinaryProtocol.VERSION}" in caps
+        self.protocol_translator.binary = binary
+        self.protocol_translator.ascii_batches = any(
+            c.startswith("ASCII") and self._version(c[5:]) >= (2, 4) for c in caps)
+        self.protocol_translator.stream = "STREAM1" in caps
+        logger.info(f"Firmware protocols {caps}; using {'binary' if binary else 'ASCII'}")
+        self.protocol_negotiated.emit(f"BIN{BinaryProtocol.VERSION}" if binary else "ASCII")
 
-    def _worker_loop(self):
-        """Background thread: drain send queue and read incoming lines."""
+    @staticmethod
+    def _version(text):
+        try:
+            return tuple(int(part) for part in text.split('.'))
+        except ValueError:
+            return ()
+
+    def _reader_loop(self):
+        """Reader thread: blocks until bytes arrive, then handles every complete line."""
+        buf = bytearray()
+        parser = self.telemetry_parser
         while not self._stop_event.is_set():
-            if not self.ser or not self.ser.is_open:
+            ser = self.ser
+            if not ser or not ser.is_open:
                 self.connected = False
                 break
-            
-            # 1. Drain outgoing queue
             try:
-                while not self._send_q.empty():
-                    msg = self._send_q.get_nowait()
-                    try:
-                        self.ser.write(msg.encode())
-                    except Exception as e:
-                        logger.debug(f'Error writing serial: {e}')
-                        self.connected = False
-                        break
-            except queue.Empty:
-                pass
-            
-            # 2. Read incoming data
+                # Blocks up to the port timeout for the first byte, then takes the whole burst
+                chunk = ser.read(max(1, ser.in_waiting))
+            except Exception as e:
+                if not self._stop_event.is_set():
+                    logger.debug(f'Error reading serial: {e}')
+                    self.connected = False
+                break
+            while self._stream_resets:
+                parser.start_stream(self._stream_resets.popleft())
+            if not chunk: continue
+            t_ns = time.monotonic_ns()
+
+            buf += chunk
+            start = 0
+            end = buf.find(b'\n')
+            while end >= 0:
+                if buf.startswith(b'SPOTS:', start):
+                    # Streaming fast path: parsed in place into the telemetry ring
+                    frame = parser.parse_stream_frame(buf, start + 6, end, t_ns)
+                    if frame >= 0: self.snapshot_updated.emit(frame)
+                else:
+                    line = buf[start:end].decode(errors='ignore').strip()
+                    if line: self._handle_line(line, t_ns)
+                start = end + 1
+                end = buf.find(b'\n', start)
+            del buf[:start]
+
+    def _handle_line(self, line, t_ns=0):
+        try:
+            # Log raw for debugging
+            self.raw_log_received.emit(line)
+
+            # Parse telemetry using the parser
+            telemetry = self.telemetry_parser.parse_line(line, t_ns)
+            if telemetry:
+                # Emit appropriate signals based on telemetry type
+                if 'pots' in telemetry:
+                    port = self._match_pot_poll(telemetry.get('pots_port'), t_ns)
+                    self.telemetry_parser.record_pots(t_ns, port, telemetry['pots'])
+                    self.pots_updated.emit(telemetry['pots'])
+                if 'frame' in telemetry:
+                    self.snapshot_updated.emit(telemetry['frame'])
+                if 'i2c_addresses' in telemetry:
+                    self.i2c_scan_complete.emit(telemetry['i2c_addresses'])
+                if 'topology' in telemetry:
+                    self.topology_updated.emit(telemetry['topology'])
+                if 'command_ack' in telemetry:
+                    self.command_acknowledged.emit(telemetry['command_ack'])
+                if 'protocol' in telemetry:
+                    self._on_protocol(telemetry['protocol'])
+        except Exception as e:
+            logger.debug(f'Error handling serial line: {e}')
+
+    def _match_pot_poll(self, port, t_ns):
+        """
+        Retires the poll a POTS reply answers and returns the reply's port.
+        v2.9+ firmware names the port in the reply; older firmware answers
+        in poll order (port None). Polls left unanswered for longer than
+        POT_POLL_TIMEOUT_NS are dropped, so a lost reply cannot shift the
+        ones after it.
+        """
+        with self._pot_lock:
+            polls = self._pot_polls
+            while polls and t_ns - polls[0][1] > self.POT_POLL_TIMEOUT_NS:
+                polls.popleft()
+            if port is None:
+                return polls.popleft()[0] if polls else None
+            slot = TelemetryParser.port_slot(port)
+            for i, (polled, _) in enumerate(polls):
+                if TelemetryParser.port_slot(polled) == slot:
+                    del polls[i]
+                    break
+            return port
+
+    def _writer_loop(self):
+        """Writer thread: sleeps on the send buffer and writes as soon as a command is put."""
+        while not self._stop_event.is_set():
+            msg = self._send_buf.pop(timeout=0.5)
+            if msg is None: continue
+            ser = self.ser
+            if not ser or not ser.is_open:
+                self.connected = False
+                break
             try:
-                if self.ser and self.ser.in_waiting:
-                    line = self.ser.readline().decode(errors='ignore').strip()
-                    if line:
-                        # Log raw for debugging
-                        self.raw_log_received.emit(line)
-
-                        # Parse telemetry using the parser
-                        telemetry = self.telemetry_parser.parse_line(line)
-                        if telemetry:
-                            # Emit appropriate signals based on telemetry type
-                            if 'pots' in telemetry:
-                                self.pots_updated.emit(telemetry['pots'])
-                            if 'i2c_addresses' in telemetry:
-                                self.i2c_scan_complete.emit(telemetry['i2c_addresses'])
-                            if 'topology' in telemetry:
-                                self.topology_updated.emit(telemetry['topology'])
-                            if 'command_ack' in telemetry:
-                                self.command_acknowledged.emit(telemetry['command_ack'])
+                ser.write(msg if isinstance(msg, bytes) else msg.encode())
+                port = self.protocol_translator.pot_poll_port(msg)
+                if port is not None:
+                    with self._pot_lock: self._pot_polls.append((port, time.monotonic_ns()))
             except Exception as e:
-                logger.debug(f'Error reading serial: {e}')
-                # Don't break loop immediately on read error, give it a chance to recover
-            
-            # Small sleep to yield CPU
-            self._stop_event.wait(0.005)
+                if not self._stop_event.is_set():
+                    logger.debug(f'Error writing serial: {e}')
+                    self.connected = False
+                break
 
-    # Removed read_loop() entirely as it conflicts with _worker_loop
\ No newline at end of file
+    # Removed read_loop() entirely as it conflicts with _reader_loop
\ No newline at end of file
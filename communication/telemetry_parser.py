@@ -1,6 +1,9 @@
 import logging
+import time
+import numpy as np
 from typing import Dict, Any, List, Optional
 from PyQt6.QtCore import QObject
+from .telemetry_ring import TelemetryRing
 
 logger = logging.getLogger('inmoov_v12')
 
@@ -10,18 +13,48 @@ class TelemetryParser(QObject):
     
     This class handles the string parsing logic. It returns structured data 
     dictionaries to be emitted by the SerialManager.
+
+    Streamed pot frames (SPOTS) take a byte-level fast path instead: they are
+    parsed straight out of the reader's buffer into a preallocated ring of
+    full-body snapshots, indexed [frame % RING_FRAMES, mux port, ADS channel].
+    Every pot frame, streamed or polled, is also appended to the timestamped
+    per-port history (TelemetryRing) that consumers read with cursors.
     """
+    RING_FRAMES = 256
+    RING_PORTS = 9          # mux ports 0-7 + direct bus
+    RING_CHANNELS = 4
+    DIRECT_SLOT = 8
 
     def __init__(self):
         super().__init__()
         self.last_pots = {}
-
-    def parse_line(self, line: str) -> Dict[str, Any]:
+        self.history = TelemetryRing()
+
+        # Streaming reassembly: SPOTS frames of one sweep -> one ring frame
+        self.ring = np.zeros((self.RING_FRAMES, self.RING_PORTS, self.RING_CHANNELS), dtype=np.int16)
+        self._ring_flat = memoryview(self.ring.reshape(-1))  # int16 item writes without NumPy scalar overhead
+        self.frame_count = 0        # published frames; the newest is frame_count - 1
+        self.stream_ports = set()   # ring slots in the sweep
+        self._stream_mask = 0
+        self._sweep_mask = 0
+        self._sweep_seq = None
+        self.stream_stats = {"frames": 0, "snapshots": 0, "incomplete": 0, "seq_gaps": 0, "errors": 0}
+
+    def start_stream(self, ports):
+        """Resets reassembly for a new stream over the given mux ports."""
+        self.stream_ports = {self.port_slot(p) for p in ports}
+        self._stream_mask = sum(1 << slot for slot in self.stream_ports)
+        self._sweep_mask = 0
+        self._sweep_seq = None
+        self.stream_stats = dict.fromkeys(self.stream_stats, 0)
+
+    def parse_line(self, line: str, t_ns: Optional[int] = None) -> Dict[str, Any]:
         """
         Parse a single line of telemetry data.
 
         Args:
             line: Raw line from serial port
+            t_ns: Arrival time (time.monotonic_ns()) for the history ring; now if omitted
 
         Returns:
             Dictionary containing parsed data (e.g., {'pots': [1, 2, 3, 4]})
@@ -34,16 +67,22 @@ class TelemetryParser(QObject):
 
         try:
             # Parse based on known formats
-            if line.startswith("POTS:"):
+            if line.startswith("SPOTS:"):
+                raw = line.encode()
+                frame = self.parse_stream_frame(raw, 6, len(raw), t_ns or time.monotonic_ns())
+                if frame >= 0: telemetry['frame'] = frame
+            elif line.startswith("POTS:"):
                 telemetry.update(self._parse_pots(line))
             elif line.startswith("I2C_SCAN:"):
                 telemetry.update(self._parse_i2c_scan(line))
             elif line.startswith("FOUND:"):
                 telemetry.update(self._parse_topology(line))
+            elif line.startswith("PROTO:"):
+                telemetry['protocol'] = line[6:].strip()
             elif line == "CMD_OK":
                 telemetry['command_ack'] = "CMD_OK"
-            elif line == "CALIB_DONE":
-                telemetry['command_ack'] = "CALIB_DONE"
+            elif line in ("CALIB_DONE", "STREAM:ON", "STREAM:OFF"):
+                telemetry['command_ack'] = line
             # We can ignore PID debug lines or add them if needed
             
         except Exception as e:
@@ -51,15 +90,17 @@ class TelemetryParser(QObject):
 
         return telemetry
 
-    def _parse_pots(self, line: str) -> Dict[str, List[int]]:
+    def _parse_pots(self, line: str) -> Dict[str, Any]:
         """
-        Parse potentiometer readings: POTS:val1,val2,val3,val4
+        Parse potentiometer readings: POTS:<port>:val1,val2,val3,val4
+        (firmware before v2.9 leaves out the port)
 
-        Returns dict with 'pots' key containing list of int values
+        Returns dict with 'pots' key containing list of int values, and
+        'pots_port' when the reply names its mux port
         """
         try:
             # Remove "POTS:" prefix
-            values_str = line[5:]
+            port, sep, values_str = line[5:].rpartition(':')
             if not values_str:
                 return {}
 
@@ -72,13 +113,76 @@ class TelemetryParser(QObject):
 
             if values:
                 # Return standard list format
-                return {'pots': values}
+                return {'pots': values, 'pots_port': port} if sep else {'pots': values}
 
         except ValueError as e:
             logger.error(f"Invalid pot values in line: {line} - {e}")
 
         return {}
 
+    @staticmethod
+    def port_slot(port) -> int:
+        """Ring slot of a mux port; the direct bus uses DIRECT_SLOT."""
+        if port is None or port == "D" or int(port) < 0: return TelemetryParser.DIRECT_SLOT
+        return int(port)
+
+    def snapshot(self, frame: int) -> np.ndarray:
+        """Pot values of a published frame as a (RING_PORTS, RING_CHANNELS) view into the ring.
+        Valid until RING_FRAMES newer frames have been written."""
+        return self.ring[frame % self.RING_FRAMES]
+
+    def parse_stream_frame(self, buf, start: int, end: int, t_ns: int = 0) -> int:
+        """
+        Parse a streamed frame from the reader's buffer: buf[start:end] =
+        <seq>:<port>:v1,v2,v3,v4 (the text after "SPOTS:"). Values go straight
+        into the ring slot of the sweep being assembled, with no str decode and
+        no per-frame list/dict; the only allocations are the short bytes pieces
+        from split, freed on return.
+
+        Returns the frame index once every streamed port of the sweep has
+        arrived, else -1. Sweeps cut short by a newer seq are dropped.
+        t_ns is the arrival time recorded in the history ring.
+        """
+        stats = self.stream_stats
+        try:
+            # C-level split beats walking the bytes in Python
+            seq, port, values = buf[start:end].split(b':')
+            v0, v1, v2, v3 = values.split(b',')
+            seq = int(seq)
+            slot = self.DIRECT_SLOT if port == b'D' else int(port)
+
+            if seq != self._sweep_seq:
+                if self._sweep_mask: stats["incomplete"] += 1
+                if self._sweep_seq is not None and seq != (self._sweep_seq + 1) & 0xFFFF:
+                    stats["seq_gaps"] += 1
+                self._sweep_seq = seq
+                self._sweep_mask = 0
+
+            ring = self._ring_flat
+            k = ((self.frame_count % self.RING_FRAMES) * self.RING_PORTS + slot) * self.RING_CHANNELS
+            ring[k] = v0 = int(v0); ring[k + 1] = v1 = int(v1); ring[k + 2] = v2 = int(v2); ring[k + 3] = v3 = int(v3)
+            self.history.push(t_ns, slot, v0, v1, v2, v3)
+        except (ValueError, IndexError, OverflowError) as e:
+            stats["errors"] += 1
+            logger.error(f"Invalid stream frame: {bytes(buf[start:end])} - {e}")
+            return -1
+
+        stats["frames"] += 1
+        self._sweep_mask |= 1 << slot
+        if self._sweep_mask & self._stream_mask != self._stream_mask:
+            return -1
+
+        stats["snapshots"] += 1
+        self._sweep_mask = 0
+        self.frame_count += 1
+        return self.frame_count - 1
+
+    def record_pots(self, t_ns: int, port, values: List[int]):
+        """Adds a polled POTS reply to the history. Replies whose port is unknown (None) are left out."""
+        if port is None: return
+        v = (list(values) + [0] * TelemetryRing.CHANNELS)[:TelemetryRing.CHANNELS]
+        self.history.push(t_ns, self.port_slot(port), *v)
+
     def _parse_i2c_scan(self, line: str) -> Dict[str, List[str]]:
         """
         Parse I2C scan results: I2C_SCAN:0x40,0x48,0x70
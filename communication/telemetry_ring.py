@@ -0,0 +1,71 @@
+import numpy as np
+
+class TelemetryRing:
+    """
+    Timestamped history of pot frames shared between the serial reader and
+    any number of consumers (controller, Engineer Mode, loggers).
+
+    Each entry is (monotonic ns at arrival, mux port, channel values). There
+    is a single writer: it fills a slot and then publishes it by advancing
+    head, a plain int store that is atomic under the GIL, so nobody locks.
+    Consumers read through their own TelemetryCursor at their own pace and
+    get views into the ring rather than copies. A view stays valid until the
+    writer laps it (size entries later).
+    """
+    CHANNELS = 4            # ADS1115 inputs per module
+
+    def __init__(self, size=4096):
+        self.size = size
+        self.t_ns = np.zeros(size, dtype=np.int64)
+        self.port = np.zeros(size, dtype=np.int8)
+        self.values = np.zeros((size, self.CHANNELS), dtype=np.int16)
+        self.head = 0  # entries ever published; the newest is head - 1
+
+        # Flat views: item writes without NumPy scalar overhead
+        self._t = memoryview(self.t_ns)
+        self._p = memoryview(self.port)
+        self._v = memoryview(self.values.reshape(-1))
+
+    def push(self, t_ns, port, v0, v1, v2, v3):
+        """Writer side (serial reader thread only)."""
+        i = self.head % self.size
+        k = i * self.CHANNELS
+        self._t[i] = t_ns
+        self._p[i] = port
+        v = self._v
+        v[k] = v0; v[k + 1] = v1; v[k + 2] = v2; v[k + 3] = v3
+        self.head += 1  # Publish
+
+    def cursor(self, from_oldest=False):
+        """New consumer, positioned at the next entry (or the oldest still held)."""
+        return TelemetryCursor(self, max(0, self.head - self.size) if from_oldest else self.head)
+
+
+class TelemetryCursor:
+    """One consumer's read position in a TelemetryRing."""
+    def __init__(self, ring, pos):
+        self.ring = ring
+        self.pos = pos
+        self.overruns = 0  # entries the writer overwrote before this consumer got to them
+
+    def pending(self):
+        return self.ring.head - self.pos
+
+    def read(self, max_items=None):
+        """
+        Next run of unread entries as (t_ns, port, values) views, empty when
+        caught up. A run stops at the ring's wrap point, so loop until empty
+        to drain everything.
+        """
+        ring = self.ring
+        head = ring.head
+        if head - self.pos > ring.size:
+            self.overruns += head - ring.size - self.pos
+            self.pos = head - ring.size
+
+        start = self.pos % ring.size
+        count = min(head - self.pos, ring.size - start)
+        if max_items is not None: count = min(count, max_items)
+        self.pos += count
+        stop = start + count
+        return ring.t_ns[start:stop], ring.port[start:stop], ring.values[start:stop]
@@ -1,5 +1,20 @@
-from .robot_loader import RobotModel, Link, Joint
-from .kinematics import KinematicsEngine
-from .geometry import GeometryGenerator
-from .collision import CollisionEngine
-from .config_manager import ConfigManager
\ No newline at end of file
+import importlib
+
+# Exports are resolved lazily so that headless users (e.g. core.robot_loader
+# together with the solver package) never pull in PyQt6 or pyqtgraph.
+_EXPORTS = {
+    "RobotModel": ".robot_loader",
+    "Link": ".robot_loader",
+    "Joint": ".robot_loader",
+    "KinematicsEngine": ".kinematics",
+    "GeometryGenerator": ".geometry",
+    "ConfigManager": ".config_manager",
+}
+
+def __getattr__(name):
+    if name == "CollisionEngine":
+        from solver import CollisionEngine
+        return CollisionEngine
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -35,9 +35,14 @@ class ConfigManager(QObject):
             "app_theme": "Cyber Dark",
             "skeleton_color": "Bone",
             "safety_collision_enabled": True,
+            "safety_budget_ms": 5.0,
             "motor_max_speed": 80,
             "motor_tolerance": 15,
+            "control_rate_hz": 100,
             "visual_ghost_opacity": 0.3,
+            "render_fps": 60,
+            "telemetry_stream_hz": 50,
+            "ik_solver": "ccd",
             "last_serial_port": None
         }
 
@@ -1,12 +1,151 @@
+import time
+import threading
 import logging
-from PyQt6.QtCore import QObject, QTimer
+import numpy as np
+from PyQt6.QtCore import QObject
+from communication.command_batcher import CommandBatch
 
 logger = logging.getLogger('inmoov_v13')
 
+class ControlClock:
+    """
+    Fixed-rate clock for a control thread.
+    Deadlines are absolute (start + n * period), so late wake-ups never
+    accumulate into drift. The last spin_s before a deadline is spun rather
+    than slept, since OS sleeps overshoot; the spin yields with sleep(0) so
+    the serial threads still get the GIL. Ticks already a full period late
+    are skipped (counted as missed) instead of bunched.
+    """
+    def __init__(self, rate_hz=100, spin_s=0.0005, history=1024):
+        self.spin_s = spin_s
+        self.jitter = np.zeros(history)     # wake-up lateness per tick (s)
+        self.exec_time = np.zeros(history)  # tick body duration (s)
+        self.set_rate(rate_hz)
+        self.reset()
+
+    def set_rate(self, rate_hz):
+        self.rate_hz = max(1.0, float(rate_hz))
+        self.period = 1.0 / self.rate_hz
+
+    def reset(self):
+        self.tick = 0
+        self.missed = 0
+        self._next = None
+        self._woke = 0.0
+
+    def wait(self, stop_event):
+        """Blocks until the next deadline. Returns False once stop_event is set."""
+        now = time.perf_counter()
+        if self._next is None:
+            self._next = now
+        else:
+            self._next += self.period
+            late = now - self._next
+            if late > self.period:
+                skipped = int(late / self.period)
+                self.missed += skipped
+                self._next += skipped * self.period
+
+        remaining = self._next - now - self.spin_s
+        if remaining > 0 and stop_event.wait(remaining): return False
+        while time.perf_counter() < self._next: time.sleep(0)
+        self._woke = time.perf_counter()
+        self.jitter[self.tick % len(self.jitter)] = self._woke - self._next
+        return not stop_event.is_set()
+
+    def done(self):
+        """Marks the end of the tick body."""
+        self.exec_time[self.tick % len(self.exec_time)] = time.perf_counter() - self._woke
+        self.tick += 1
+
+    def stats(self):
+        n = min(self.tick, len(self.jitter))
+        jitter, exec_time = self.jitter[:n] * 1000, self.exec_time[:n] * 1000
+        return {"rate_hz": self.rate_hz, "ticks": self.tick, "missed": self.missed,
+                "jitter_mean_ms": float(jitter.mean()) if n else 0.0,
+                "jitter_p99_ms": float(np.percentile(jitter, 99)) if n else 0.0,
+                "jitter_max_ms": float(jitter.max()) if n else 0.0,
+                "exec_mean_ms": float(exec_time.mean()) if n else 0.0,
+                "exec_max_ms": float(exec_time.max()) if n else 0.0}
+
+
+class JointTables:
+    """
+    Hardware map compiled into per-joint arrays (index = position in ids).
+    Rebuilt on hardware_map_changed and swapped in whole by the control
+    thread between ticks, so it always sees one consistent set; targets,
+    pot readings and motor states live here too and are carried over by
+    joint id (carry_over) at the swap.
+    """
+    NO_CHANNEL = -1
+    UNKNOWN = 2  # last_state before anything was sent
+
+    def __init__(self, hardware_map, port_slot, channels, rate_hz, previous=None):
+        self.ids = list(hardware_map.keys())
+        self.index = {jid: i for i, jid in enumerate(self.ids)}
+        self.hw = [hardware_map[jid] for jid in self.ids]  # Command building (name, mux_port)
+        n = len(self.ids)
+
+        self.n20 = np.zeros(n, dtype=bool)
+        self.mux_port = np.zeros(n, dtype=np.int8)          # ring slot (8 = direct bus)
+        self.ads_channel = np.full(n, self.NO_CHANNEL, dtype=np.int8)
+        self.gain = np.zeros(n)                             # pot counts per degree
+        self.pot_offset = np.zeros(n)                       # min_ana
+        self.angle_offset = np.zeros(n)                     # angle_min
+        self.divider = np.ones(n, dtype=np.int64)           # run every Nth tick (control_hz)
+        self.phase = np.zeros(n, dtype=np.int64)
+
+        for i, hw in enumerate(self.hw):
+            self.n20[i] = hw.get('motor_type') == 'n20'
+            self.mux_port[i] = port_slot(hw.get('mux_port', 0))
+            ch = hw.get('ads_channel')
+            if ch is not None and 0 <= ch < channels: self.ads_channel[i] = ch
+
+            min_ang, max_ang = hw.get('angle_min', 0), hw.get('angle_max', 180)
+            if max_ang == min_ang:
+                self.n20[i] = False  # No usable angle -> pot map
+                continue
+            min_pot = hw.get('min_ana', 0)
+            self.gain[i] = (hw.get('max_ana', 1023) - min_pot) / (max_ang - min_ang)
+            self.pot_offset[i] = min_pot
+            self.angle_offset[i] = min_ang
+
+            hz = hw.get('control_hz')
+            if hz and hz < rate_hz:
+                self.divider[i] = max(1, round(rate_hz / hz))
+                self.phase[i] = i % self.divider[i]
+
+        self.controlled = self.n20 & (self.ads_channel != self.NO_CHANNEL)
+        self.multirate = bool((self.divider > 1).any())
+
+        # State
+        self.target = np.full(n, np.nan)     # deg
+        self.pots = np.full(n, np.nan)       # raw counts
+        self.pot_t_ns = np.zeros(n, dtype=np.int64)
+        self.last_state = np.full(n, self.UNKNOWN, dtype=np.int8)  # -1 REV, 0 STOP, 1 FWD
+        if previous is not None: self.carry_over(previous)
+
+    def carry_over(self, previous):
+        """Copies state from the tables this set replaces, by joint id."""
+        for jid, i in self.index.items():
+            j = previous.index.get(jid)
+            if j is None: continue
+            self.target[i] = previous.target[j]
+            self.pots[i] = previous.pots[j]
+            self.pot_t_ns[i] = previous.pot_t_ns[j]
+            self.last_state[i] = previous.last_state[j]
+
+
 class BangBangController(QObject):
     """
     Python-side Logic Controller for N20 Motors.
     Replaces the firmware loop to allow distributed control.
+
+    The loop runs on its own thread (ControlClock, control_rate_hz) and
+    never touches Qt: it reads pots from the telemetry history and queues
+    batched commands into SerialManager's thread-safe send buffer, so a
+    stalled GUI does not stall the motors. A joint may run slower than the
+    loop with a 'control_hz' entry in its hardware map.
     """
     
     def __init__(self, serial_manager, config_manager):
@@ -15,25 +154,62 @@ class BangBangController(QObject):
         self.config = config_manager
         
         self.active = False
-        self.timer = QTimer()
-        self.timer.timeout.connect(self._control_tick)
+        self.clock = ControlClock(self.config.get("control_rate_hz") or 100)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._batch = CommandBatch()  # Control thread's own; the GUI uses serial.batcher
         
         # State Storage
         self.targets = {}       # {joint_id: target_angle_deg}
-        self.current_pots = {}  # {joint_id: raw_pot_val}
-        self.last_command = {}  # {joint_id: "FWD"|"REV"|"STOP"}
         
+        # Sensor feed: our own cursor into the serial reader's telemetry history
+        self.pots_cursor = self.serial.telemetry_parser.history.cursor()
+        self.tables = None      # JointTables, compiled from the hardware map
+        self._pending_tables = None  # Recompiled tables waiting for the control thread
+        self._tables_lock = threading.Lock()
+        self._compile_tables()
+
         # Load initial values from Config
         self._update_params()
         
         # LISTEN for changes! (The Explosion)
         self.config.preference_changed.connect(self._on_pref_changed)
+        self.config.hardware_map_changed.connect(self._compile_tables)
 
     def _on_pref_changed(self, key, value):
         """Reacts instantly to settings changes."""
         if key in ["motor_max_speed", "motor_tolerance"]:
             self._update_params()
             logger.info(f"Controller updated {key} to {value}")
+        elif key == "control_rate_hz":
+            self.clock.set_rate(value or 100)
+            self._compile_tables()
+            logger.info(f"Controller rate set to {self.clock.rate_hz:g} Hz")
+
+    def _compile_tables(self):
+        """
+        Compiles the hardware map. A running loop swaps the result in at its
+        next tick, since only the control thread may touch the live state;
+        otherwise it is swapped in right away.
+        """
+        parser = self.serial.telemetry_parser
+        tables = JointTables(self.config.hardware_map, parser.port_slot, parser.RING_CHANNELS,
+                             self.clock.rate_hz)
+        with self._tables_lock:
+            self._pending_tables = tables
+        if self._thread is None or not self._thread.is_alive():
+            self._swap_tables()
+
+    def _swap_tables(self):
+        """Installs pending tables, carrying state over from the current ones (between ticks)."""
+        with self._tables_lock:
+            tables, self._pending_tables = self._pending_tables, None
+        if tables is None: return
+        if self.tables is not None: tables.carry_over(self.tables)
+        for jid, angle in self.targets.copy().items():
+            i = tables.index.get(jid)
+            if i is not None: tables.target[i] = angle
+        self.tables = tables
 
     def _update_params(self):
         """Reads Governor limits from config."""
@@ -42,86 +218,102 @@ class BangBangController(QObject):
 
     def start(self):
         if not self.active:
+            if self._thread and self._thread.is_alive():
+                self._thread.join(timeout=0.5)  # Previous loop is finishing its last tick
+                if self._thread.is_alive():
+                    logger.warning("Previous control thread still running; start retried on the next target")
+                    return
             self.active = True
-            self.timer.start(50) # 20Hz Control Loop
-            logger.info("Bang-Bang Controller Started")
+            self._stop_event.clear()
+            self.clock.reset()
+            self._swap_tables()  # Tables compiled while the loop was winding down
+            self._thread = threading.Thread(target=self._run, name="BangBangControl", daemon=True)
+            self._thread.start()
+            logger.info(f"Bang-Bang Controller Started ({self.clock.rate_hz:g} Hz)")
 
     def stop(self):
+        """Stops the loop; the loop thread sends the motor stops on its way out."""
         self.active = False
-        self.timer.stop()
-        self._stop_all_motors()
+        self._stop_event.set()
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self._stop_all_motors()  # No loop thread left to do it
+        elif thread is not threading.current_thread():
+            thread.join(timeout=0.5)
+            if thread.is_alive():
+                logger.warning("Control thread still in a tick; it stops the motors when the tick ends")
         logger.info("Bang-Bang Controller Stopped")
 
+    def stats(self):
+        """Tick timing: rate, ticks, missed, jitter and execution time (ms)."""
+        return self.clock.stats()
+
+    def _run(self):
+        """Control thread body: no Qt calls past this point."""
+        clock = self.clock
+        try:
+            while clock.wait(self._stop_event):
+                try:
+                    self._swap_tables()
+                    self._control_tick(clock.tick)
+                except Exception as e:
+                    logger.error(f"Control tick error: {e}")
+                clock.done()
+        finally:
+            self._stop_all_motors()  # Same thread as the ticks, so _batch is never shared
+            self._swap_tables()
+
     def set_target(self, joint_id, angle):
         """Called when user moves slider."""
         self.targets[str(joint_id)] = float(angle)
+        i = self.tables.index.get(str(joint_id))
+        if i is not None: self.tables.target[i] = float(angle)
         if not self.active:
             self.start()
 
-    def update_sensors(self, pot_data, mux_context=0):
-        # Find which joints are on the active Mux Port
-        # Note: mux_context handling needs to be robust in main loop
-        # For now, we iterate all mapped hardware
-        for jid, hw in self.config.hardware_map.items():
-            # In a real distributed read, we'd check if hw.mux_port == mux_context
-            # Here we assume data flow is handled correctly upstream or just map by channel
-            ads_ch = hw.get('ads_channel')
-            if ads_ch is not None and isinstance(pot_data, list) and ads_ch < len(pot_data):
-                self.current_pots[jid] = pot_data[ads_ch]
-
-    def _control_tick(self):
-        """The Main Logic Loop (Runs 20 times/sec)"""
+    @property
+    def current_pots(self):
+        """{joint_id: raw_pot_val} for joints with a reading."""
+        t = self.tables
+        return {t.ids[i]: int(t.pots[i]) for i in np.flatnonzero(~np.isnan(t.pots))}
+
+    def _read_sensors(self, t):
+        """Catches up on every pot frame (streamed or polled) received since the last tick."""
+        has_channel = t.ads_channel != JointTables.NO_CHANNEL
+        while True:
+            t_ns, ports, values = self.pots_cursor.read()
+            if not len(t_ns): break
+            # Newest row of this run for each joint's port
+            match = (ports[:, None] == t.mux_port[None, :]) & has_channel
+            found = match.any(axis=0)
+            if not found.any(): continue
+            row = len(ports) - 1 - np.argmax(match[::-1], axis=0)
+            t.pots[found] = values[row[found], t.ads_channel[found]]
+            t.pot_t_ns[found] = t_ns[row[found]]
+
+    def _control_tick(self, tick=0):
+        """The Main Logic Loop (control_rate_hz, on the control thread)"""
         if not self.active: return
+        t = self.tables
+        self._read_sensors(t)
 
-        # Iterate through all joints we have targets for
-        for jid, target_angle in self.targets.items():
-            
-            if jid not in self.current_pots: continue
-            current_pot = self.current_pots[jid]
-            
-            hw = self.config.get_pin_config(jid)
-            if hw.get('motor_type') != 'n20': continue 
-            
-            # Map Angle -> Target Pot Value
-            min_pot = hw.get('min_ana', 0)
-            max_pot = hw.get('max_ana', 1023)
-            min_ang = hw.get('angle_min', 0)
-            max_ang = hw.get('angle_max', 180)
-            
-            if (max_ang - min_ang) == 0: continue
-            
-            target_pot = min_pot + (target_angle - min_ang) * (max_pot - min_pot) / (max_ang - min_ang)
-            
-            error = target_pot - current_pot
-            
-            command_speed = 0
-            if abs(error) > self.tolerance:
-                # GOVERNOR CHECK: Use the dynamic motor_speed from settings
-                if error > 0:
-                    command_speed = self.motor_speed  
-                else:
-                    command_speed = -self.motor_speed 
-            
-            self._send_if_changed(jid, command_speed, hw)
-
-    def _send_if_changed(self, jid, speed, hw_config):
-        state_key = "STOP"
-        if speed > 0: state_key = "FWD"
-        if speed < 0: state_key = "REV"
-        
-        last = self.last_command.get(jid, None)
-        
-        if state_key != last:
-            cmd_str = self.serial.protocol_translator.translate_motor_raw(int(jid), speed, hw_config)
-            if cmd_str:
-                self.serial.send_raw(cmd_str)
-                self.last_command[jid] = state_key
+        # All controlled joints at once: angle -> target pot, error, bang-bang state
+        run = t.controlled & ~np.isnan(t.target) & ~np.isnan(t.pots)
+        if t.multirate: run &= (tick + t.phase) % t.divider == 0
+        error = t.pot_offset + (t.target - t.angle_offset) * t.gain - t.pots
+        state = np.where(error > self.tolerance, 1, np.where(error < -self.tolerance, -1, 0)).astype(np.int8)
+
+        # Only state changes are sent; commands are batched per mux port
+        changed = np.flatnonzero(run & (state != t.last_state))
+        for i in changed:
+            self._batch.add(t.hw[i], "motor", int(state[i]) * self.motor_speed)
+        t.last_state[changed] = state[changed]
+        self._batch.send(self.serial)
 
     def _stop_all_motors(self):
         # Iterate all active motors and send stop
-        for jid in self.last_command:
-            if self.last_command[jid] != "STOP":
-                hw = self.config.get_pin_config(jid)
-                cmd = self.serial.protocol_translator.translate_motor_raw(int(jid), 0, hw)
-                if cmd: self.serial.send_raw(cmd)
-        self.last_command.clear()
\ No newline at end of file
+        t = self.tables
+        for i in np.flatnonzero((t.last_state == 1) | (t.last_state == -1)):
+            self._batch.add(t.hw[i], "motor", 0)
+        self._batch.send(self.serial)
+        t.last_state[:] = JointTables.UNKNOWN
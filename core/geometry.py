@@ -1,6 +1,9 @@
 import numpy as np
-import math
+import os
+import json
+import hashlib
 import logging
+from collections import OrderedDict
 
 try:
     import pyqtgraph.opengl as gl
@@ -11,23 +14,165 @@ except ImportError:
 logger = logging.getLogger('inmoov_v13')
 
 class GeometryGenerator:
+    # Content-hashed MeshData cache shared by scene and ghost items: {key: MeshData}
+    _mesh_cache = OrderedDict()
+    MESH_CACHE_SIZE = 512
+
+    # On-disk (vertexes, faces) cache: {key: arrays} mirrored to a per-model .npz.
+    # Bump when generator output changes to invalidate old files.
+    DISK_CACHE_VERSION = 1
+    _disk_path = None
+    _disk_arrays = {}
+    _disk_used = set()
+    _disk_dirty = False
+
+    # Level of detail: ring/sphere segments per level, camera distances (mm) where
+    # each coarser level starts, and how many levels coarser each item role starts.
+    LOD_SEGMENTS = (32, 16, 8)
+    LOD_DISTANCES = (1500.0, 3000.0)
+    LOD_ROLE_BIAS = {"scene": 0, "ghost": 1, "collider": 1}
+
+    @staticmethod
+    def lod_segments(distance, role="scene"):
+        """Segment count for an item of `role` seen from camera `distance`."""
+        G = GeometryGenerator
+        level = int(np.searchsorted(G.LOD_DISTANCES, distance)) + G.LOD_ROLE_BIAS.get(role, 0)
+        return G.LOD_SEGMENTS[min(level, len(G.LOD_SEGMENTS) - 1)]
+
     @staticmethod
-    def generate_mesh_item(visual_data, color_tuple):
+    def generate_mesh_item(visual_data, color_tuple, segments=32):
         if not HAS_GL: return None
-        md = None
-        
+        return GeometryGenerator.mesh_item(GeometryGenerator.mesh_data(visual_data, segments), color_tuple)
+
+    @staticmethod
+    def mesh_item(md, color_tuple):
+        if not HAS_GL or not md: return None
+        return gl.GLMeshItem(meshdata=md, smooth=True, color=color_tuple, shader='shaded', glOptions='opaque')
+
+    @staticmethod
+    def mesh_key(visual_data, segments=32):
+        """Hash of everything that shapes the mesh (colour is not part of it)."""
+        geo = visual_data.to_dict()
+        geo.pop("color", None)
+        geo["segments"] = segments
+        return hashlib.sha1(json.dumps(geo, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def mesh_data(visual_data, segments=32):
+        """Cached MeshData for a VisualData block, or None for empty links."""
+        if not HAS_GL: return None
+        key = GeometryGenerator.mesh_key(visual_data, segments)
+        GeometryGenerator._disk_used.add(key)
+        md = GeometryGenerator._cache_get(key)
+        if md is not False: return md
+
+        arrays = GeometryGenerator._cached_arrays(key, visual_data, segments)
+        md = gl.MeshData(vertexes=arrays[0], faces=arrays[1]) if arrays else None
+        return GeometryGenerator._cache_put(key, md)
+
+    @staticmethod
+    def merged_mesh_data(parts, segments=32):
+        """
+        One cached MeshData for several rigidly attached visuals.
+        parts: [(VisualData, (4, 4) offset into the shared frame)].
+        """
+        if not HAS_GL: return None
+        if len(parts) == 1 and np.allclose(parts[0][1], np.eye(4)):
+            return GeometryGenerator.mesh_data(parts[0][0], segments)
+
+        keys = [GeometryGenerator.mesh_key(v, segments) for v, _ in parts]
+        offsets = np.round(np.array([m for _, m in parts], dtype=float), 6)
+        key = hashlib.sha1(("".join(keys)).encode() + offsets.tobytes()).hexdigest()
+        GeometryGenerator._disk_used.update(keys)
+        md = GeometryGenerator._cache_get(key)
+        if md is not False: return md
+
+        verts, faces, count = [], [], 0
+        for k, (visual, offset) in zip(keys, parts):
+            arrays = GeometryGenerator._cached_arrays(k, visual, segments)
+            if not arrays: continue
+            v, f = arrays
+            verts.append(v @ offset[:3, :3].T + offset[:3, 3])
+            faces.append(f + count)
+            count += len(v)
+        md = gl.MeshData(vertexes=np.concatenate(verts), faces=np.concatenate(faces)) if verts else None
+        return GeometryGenerator._cache_put(key, md)
+
+    @staticmethod
+    def _cache_get(key):
+        """Cached MeshData (None is a valid entry), or False on a miss."""
+        cache = GeometryGenerator._mesh_cache
+        if key not in cache: return False
+        cache.move_to_end(key)
+        return cache[key]
+
+    @staticmethod
+    def _cache_put(key, md):
+        cache = GeometryGenerator._mesh_cache
+        cache[key] = md
+        if len(cache) > GeometryGenerator.MESH_CACHE_SIZE: cache.popitem(last=False)
+        return md
+
+    @staticmethod
+    def _cached_arrays(key, visual_data, segments):
+        """(vertexes, faces) from the disk cache, generating and recording them on a miss."""
+        G = GeometryGenerator
+        arrays = G._disk_arrays.get(key)
+        if arrays is None:
+            arrays = G.mesh_arrays(visual_data, segments)
+            if arrays is not None:
+                G._disk_arrays[key] = arrays
+                G._disk_dirty = True
+        return arrays
+
+    @staticmethod
+    def load_disk_cache(path):
+        """Switches the on-disk cache to path and loads its arrays. Returns the entry count."""
+        G = GeometryGenerator
+        G._disk_path, G._disk_arrays, G._disk_used, G._disk_dirty = path, {}, set(), False
+        if not path or not os.path.exists(path): return 0
+        try:
+            with np.load(path) as npz:
+                if int(npz["version"]) != G.DISK_CACHE_VERSION: return 0
+                for name in npz.files:
+                    if name.endswith("_v"):
+                        key = name[:-2]
+                        G._disk_arrays[key] = (npz[name], npz[key + "_f"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable mesh cache {path}: {e}")
+            G._disk_arrays = {}
+        return len(G._disk_arrays)
+
+    @staticmethod
+    def save_disk_cache():
+        """Rewrites the cache file if meshes were generated or entries went unused since loading."""
+        G = GeometryGenerator
+        stale = set(G._disk_arrays) - G._disk_used
+        if not G._disk_path or not (G._disk_dirty or stale): return
+        for key in stale: del G._disk_arrays[key]
+        data = {"version": np.array(G.DISK_CACHE_VERSION)}
+        for key, (verts, faces) in G._disk_arrays.items():
+            data[key + "_v"] = verts; data[key + "_f"] = faces
+        try:
+            with open(G._disk_path, 'wb') as f:
+                np.savez(f, **data)
+            G._disk_dirty = False
+            logger.info(f"Mesh cache saved: {len(G._disk_arrays)} entries")
+        except Exception as e:
+            logger.warning(f"Could not write mesh cache {G._disk_path}: {e}")
+
+    @staticmethod
+    def mesh_arrays(visual_data, segments=32):
+        """(vertexes (V, 3), faces (F, 3)) for a VisualData block, or None."""
         if visual_data.method == "loft":
-            md = GeometryGenerator.generate_loft(visual_data)
+            return GeometryGenerator.generate_loft(visual_data, segments)
         elif visual_data.method == "sphere":
-            md = GeometryGenerator.generate_sphere(visual_data.radius)
+            return GeometryGenerator.generate_sphere(visual_data.radius, segments // 2, segments)
         elif visual_data.method == "cylinder":
-            md = GeometryGenerator.generate_cylinder_as_loft(visual_data)
+            return GeometryGenerator.generate_cylinder_as_loft(visual_data, segments)
         elif visual_data.method == "box":
             s = visual_data.size if hasattr(visual_data, 'size') else (10,10,10)
-            md = GeometryGenerator.generate_box(s[0], s[1], s[2])
-        
-        if md:
-            return gl.GLMeshItem(meshdata=md, smooth=True, color=color_tuple, shader='shaded', glOptions='opaque')
+            return GeometryGenerator.generate_box(s[0], s[1], s[2])
         return None
 
     @staticmethod
@@ -35,34 +180,27 @@ class GeometryGenerator:
         length = visual_data.length_mm
         sections = visual_data.sections
         direction = -1.0 if visual_data.flip else 1.0 # UP = 1, DOWN = -1
-        
+
         if not sections: return None
 
-        rings = []
-        for section in sections:
+        theta = 2 * np.pi * np.arange(segments) / segments
+        cs, sn = np.cos(theta), np.sin(theta)
+        rings = np.zeros((len(sections), segments, 3))
+        for ring, section in zip(rings, sections):
             # Apply direction multiplier
-            z_pos = section.get("percent", 0.0) * length * direction
+            ring[:, 2] = section.get("percent", 0.0) * length * direction
             shape_type = section.get("shape", "circle")
-            
-            ring_verts = []
-            for i in range(segments):
-                theta = 2 * math.pi * i / segments
-                x, y = 0.0, 0.0
-                
-                if shape_type == "circle":
-                    r = section.get("radius", 10)
-                    x = r * math.cos(theta); y = r * math.sin(theta)
-                elif shape_type == "oval":
-                    rx = section.get("radius_x", 10); ry = section.get("radius_y", 10)
-                    x = rx * math.cos(theta); y = ry * math.sin(theta)
-                elif shape_type == "box":
-                    w = section.get("width", 10) / 2; d = section.get("depth", 10) / 2
-                    cs = math.cos(theta); sn = math.sin(theta)
-                    x = w * np.sign(cs) * (abs(cs) ** 0.3)
-                    y = d * np.sign(sn) * (abs(sn) ** 0.3)
-
-                ring_verts.append([x, y, z_pos]) 
-            rings.append(np.array(ring_verts))
+
+            if shape_type == "circle":
+                r = section.get("radius", 10)
+                ring[:, 0] = r * cs; ring[:, 1] = r * sn
+            elif shape_type == "oval":
+                ring[:, 0] = section.get("radius_x", 10) * cs
+                ring[:, 1] = section.get("radius_y", 10) * sn
+            elif shape_type == "box":
+                w = section.get("width", 10) / 2; d = section.get("depth", 10) / 2
+                ring[:, 0] = w * np.sign(cs) * (np.abs(cs) ** 0.3)
+                ring[:, 1] = d * np.sign(sn) * (np.abs(sn) ** 0.3)
 
         return GeometryGenerator._stitch_rings(rings, segments)
 
@@ -71,36 +209,30 @@ class GeometryGenerator:
         r = visual_data.radius
         l = visual_data.length_mm
         direction = -1.0 if visual_data.flip else 1.0
-        
-        ring_bottom = []
-        ring_top = []
-        for i in range(segments):
-            theta = 2 * math.pi * i / segments
-            x = r * math.cos(theta)
-            y = r * math.sin(theta)
-            ring_bottom.append([x, y, 0])
-            ring_top.append([x, y, l * direction])
-            
-        rings = [np.array(ring_bottom), np.array(ring_top)]
+
+        theta = 2 * np.pi * np.arange(segments) / segments
+        rings = np.zeros((2, segments, 3))
+        rings[:, :, 0] = r * np.cos(theta)
+        rings[:, :, 1] = r * np.sin(theta)
+        rings[1, :, 2] = l * direction
         return GeometryGenerator._stitch_rings(rings, segments)
 
     @staticmethod
     def _stitch_rings(rings, segments):
-        all_verts = np.concatenate(rings)
-        faces = []
-        num_rings = len(rings)
-        for r in range(num_rings - 1):
-            base = r * segments
-            next = (r + 1) * segments
-            for i in range(segments):
-                i_n = (i + 1) % segments
-                v1 = base + i; v2 = base + i_n; v3 = next + i; v4 = next + i_n
-                faces.append([v1, v2, v3]); faces.append([v2, v4, v3])
-        return gl.MeshData(vertexes=all_verts, faces=np.array(faces))
+        """Two triangles per quad between consecutive rings of `segments` vertices."""
+        all_verts = np.asarray(rings, dtype=float).reshape(-1, 3)
+        num_rings = len(all_verts) // segments
+        i = np.arange(segments)
+        base = (np.arange(num_rings - 1) * segments)[:, None]
+        v1 = base + i; v2 = base + (i + 1) % segments
+        v3 = v1 + segments; v4 = v2 + segments
+        faces = np.stack([np.stack([v1, v2, v3], axis=-1), np.stack([v2, v4, v3], axis=-1)], axis=2)
+        return all_verts, faces.reshape(-1, 3)
 
     @staticmethod
     def generate_sphere(radius, rows=16, cols=32):
-        return gl.MeshData.sphere(rows=rows, cols=cols, radius=radius)
+        md = gl.MeshData.sphere(rows=rows, cols=cols, radius=radius)
+        return md.vertexes(), md.faces()
 
     @staticmethod
     def generate_box(w, h, d):
@@ -115,4 +247,46 @@ class GeometryGenerator:
             [0, 4, 7], [0, 7, 3], [1, 5, 6], [1, 6, 2],
             [0, 1, 5], [0, 5, 4], [3, 2, 6], [3, 6, 7]
         ], dtype=int)
-        return gl.MeshData(vertexes=verts, faces=faces)
\ No newline at end of file
+        return verts, faces
+
+class InstancedSpheres:
+    """
+    Many spheres drawn as a single GLMeshItem.
+    One unit-sphere mesh is expanded by a per-instance (center, radius)
+    buffer in one vectorized pass and uploaded as one vertex buffer per
+    frame. Moving and scaling a sphere leaves its normals unchanged, so each
+    LOD keeps one MeshData whose positions are swapped in place and whose
+    normals MeshData computes only once.
+    """
+    def __init__(self, radii, color, segments=16):
+        self.radii = np.asarray(radii, dtype=np.float32)
+        self.centers = None
+        self._meshes = {}  # {segments: (MeshData, unit-sphere vertexes)}
+        self.item = gl.GLMeshItem(smooth=True, color=color, shader='shaded', glOptions='opaque')
+        self.set_segments(segments)
+
+    def set_segments(self, segments):
+        self.segments = segments
+        if segments not in self._meshes:
+            verts, faces = GeometryGenerator.generate_sphere(1.0, segments // 2, segments)
+            n = len(self.radii)
+            unit = verts.astype(np.float32)
+            faces = (faces[np.newaxis] + (np.arange(n) * len(verts))[:, None, None]).reshape(-1, 3)
+            self._meshes[segments] = (gl.MeshData(vertexes=np.tile(unit, (n, 1)), faces=faces), unit)
+        self._md, self._unit = self._meshes[segments]
+        self.item.setMeshData(meshdata=self._md)
+        if self.centers is not None: self.set_centers(self.centers)
+
+    def set_centers(self, centers):
+        """centers: (K, 3) world positions, one per radius."""
+        self.centers = centers
+        if not self.item.visible(): return
+        verts = (centers[:, None, :] + self.radii[:, None, None] * self._unit[np.newaxis]).reshape(-1, 3)
+        self._md.setVertexes(verts, resetNormals=False)
+        self.item.meshDataChanged()
+
+    def setVisible(self, visible):
+        was_visible = self.item.visible()
+        self.item.setVisible(visible)
+        if visible and not was_visible and self.centers is not None:
+            self.set_centers(self.centers)
@@ -1,30 +1,27 @@
 import numpy as np
-from PyQt6.QtGui import QMatrix4x4, QVector3D, QVector4D
+import os
+from PyQt6.QtGui import QMatrix4x4
 import logging
-import math
-from .geometry import GeometryGenerator
-from .collision import CollisionEngine
+from solver import KinematicSolver
+from .geometry import GeometryGenerator, InstancedSpheres, HAS_GL
 from .config_manager import config_manager 
 
-try:
-    import pyqtgraph.opengl as gl
-    HAS_GL = True
-except ImportError:
-    HAS_GL = False
-
 logger = logging.getLogger('inmoov_v13')
 
-class KinematicsEngine:
+class KinematicsEngine(KinematicSolver):
+    """
+    Qt/GL adapter around the headless KinematicSolver.
+    Owns the scene, ghost and collider GL items and syncs the solver's FK
+    stacks into them after every update.
+    """
     def __init__(self, robot_model):
-        self.model = robot_model
+        super().__init__(robot_model)
         
         self.scene_nodes = {}
         self.ghost_nodes = {}
-        self.collider_nodes = {}
-        self.current_state = {} 
-        self.target_state = {}
-        
-        self.collision_engine = CollisionEngine(self.model)
+        self.collider_layer = None  # InstancedSpheres over every collision sphere
+        self._lod = {}  # {role: segments} currently built for scene/ghost/collider items
+        self.render_scheduler = None  # RenderScheduler; when set, FK passes are coalesced per frame
 
         self._load_colors()
         config_manager.visual_changed.connect(self.refresh_theme)
@@ -72,177 +69,123 @@ class KinematicsEngine:
 
     def initialize_view(self, view_widget):
         if not self.model.root: return
-        self.scene_nodes.clear(); self.ghost_nodes.clear(); self.collider_nodes.clear()
+        self.scene_nodes.clear(); self.ghost_nodes.clear(); self.collider_layer = None
+        self.tree.compile()
+        
+        cache_path = os.path.splitext(self.model.file_path)[0] + ".mesh.npz" if self.model.file_path else None
+        if cache_path != GeometryGenerator._disk_path:
+            GeometryGenerator.load_disk_cache(cache_path)
+        distance = getattr(view_widget, 'opts', {}).get('distance', 1000.0)
+        self._lod = {role: GeometryGenerator.lod_segments(distance, role) for role in ("scene", "ghost", "collider")}
         
-        self._build_tree(self.model.root, view_widget, self.scene_nodes, False)
-        self._build_tree(self.model.root, view_widget, self.ghost_nodes, True)
+        self._build_bodies(view_widget, self.scene_nodes, False)
+        self._build_bodies(view_widget, self.ghost_nodes, True)
         self._build_colliders(view_widget)
+        GeometryGenerator.save_disk_cache()
         self.update_fk()
 
-    def _build_tree(self, link, view, node_dict, is_ghost):
-        color = self.colors["ghost"] if is_ghost else self.colors.get(link.visual.color_key, self.colors["default"])
-        mesh_item = GeometryGenerator.generate_mesh_item(link.visual, color)
-        
-        # Invisible Transform Node for empty links
-        if mesh_item is None and HAS_GL:
-            mesh_item = gl.GLAxisItem()
-            mesh_item.setSize(0,0,0) 
-            mesh_item.setVisible(False)
-
-        if mesh_item:
-            view.addItem(mesh_item)
-            node_dict[link.name] = mesh_item
-            
-            if is_ghost:
-                mesh_item.setVisible(False)
-            else:
-                if isinstance(mesh_item, gl.GLMeshItem):
-                    mesh_item.setVisible(True)
-                mesh_item.link_data = link
-
-        for child in link.children:
-            self._build_tree(child, view, node_dict, is_ghost)
+    def _build_bodies(self, view, node_dict, is_ghost):
+        """
+        One GL item per rigid body (per colour in the solid scene): links hanging
+        off fixed joints are merged into their body's vertex buffer,
+        which then moves with a single setTransform.
+        node_dict is keyed by the first link of each item.
+        """
+        tree = self.tree
+        neutral = tree.forward(tree.angles_from_state({}))
+        inverse = np.linalg.inv(neutral[tree.body])
+
+        groups = {}
+        for i, link in enumerate(tree.links):
+            key = (int(tree.body[i]), None if is_ghost else link.visual.color_key)
+            groups.setdefault(key, []).append(i)
+
+        segments = self._lod["ghost" if is_ghost else "scene"]
+        for (body, color_key), members in groups.items():
+            parts = [(tree.links[i].visual, inverse[i] @ neutral[i]) for i in members]
+            color = self.colors["ghost"] if is_ghost else self.colors.get(color_key, self.colors["default"])
+            item = GeometryGenerator.mesh_item(GeometryGenerator.merged_mesh_data(parts, segments), color)
+            if item is None: continue
+
+            item.mesh_parts = parts
+            item.body_row = body
+            item.link_data = tree.links[members[0]]
+            item.setVisible(not is_ghost)
+            view.addItem(item)
+            node_dict[tree.names[members[0]]] = item
 
     def _build_colliders(self, view):
-        from .robot_loader import VisualData
-        for link_name, spheres in self.collision_engine.colliders.items():
-            for i, sphere in enumerate(spheres):
-                vdata = VisualData({"method": "sphere", "radius": sphere.radius})
-                mesh = GeometryGenerator.generate_mesh_item(vdata, self.colors["collider"])
-                if mesh:
-                    view.addItem(mesh)
-                    mesh.setVisible(False)
-                    self.collider_nodes[f"{link_name}_{i}"] = mesh
+        if not HAS_GL or not len(self.collision_engine.sphere_radii): return
+        self.collider_layer = InstancedSpheres(self.collision_engine.sphere_radii, self.colors["collider"], self._lod["collider"])
+        self.collider_layer.setVisible(False)
+        view.addItem(self.collider_layer.item)
 
     def set_visibility(self, show_ghost, show_colliders):
         for n in self.ghost_nodes.values(): 
             if hasattr(n, 'setVisible'): n.setVisible(show_ghost)
-        for n in self.collider_nodes.values(): 
-            n.setVisible(show_colliders)
-
-    def update_state_from_sensors(self, sensor_data):
-        self.current_state.update({str(k): float(v) for k, v in sensor_data.items()})
-        self.update_fk()
-
-    def set_target_pose(self, pose_data):
-        clean = {str(k): float(v) for k, v in pose_data.items()}
-        self.target_state.update(clean)
-        self.current_state.update(clean) 
-        self.update_fk()
+        if self.collider_layer:
+            self.collider_layer.setVisible(show_colliders)
+
+    def apply_lod(self, distance):
+        """Swaps item meshes to the detail level for the camera distance; no-op when unchanged."""
+        if self.collider_layer:
+            segments = GeometryGenerator.lod_segments(distance, "collider")
+            if self._lod.get("collider") != segments: self.collider_layer.set_segments(segments)
+            self._lod["collider"] = segments
+        for role, nodes in (("scene", self.scene_nodes), ("ghost", self.ghost_nodes)):
+            segments = GeometryGenerator.lod_segments(distance, role)
+            if self._lod.get(role) == segments: continue
+            self._lod[role] = segments
+            for item in nodes.values():
+                item.setMeshData(meshdata=GeometryGenerator.merged_mesh_data(item.mesh_parts, segments))
 
     def rebuild_scene(self, view_widget):
-        for n in list(self.scene_nodes.values()) + list(self.ghost_nodes.values()) + list(self.collider_nodes.values()):
+        layer = [self.collider_layer.item] if self.collider_layer else []
+        for n in list(self.scene_nodes.values()) + list(self.ghost_nodes.values()) + layer:
             try: view_widget.removeItem(n)
             except: pass
         self.initialize_view(view_widget)
 
+    def _state_changed(self):
+        if self.render_scheduler: self.render_scheduler.request_fk()
+        else: self.update_fk()
+
+    def _sync_fk(self):
+        """Runs a deferred FK pass before FK results are read."""
+        if self.render_scheduler and self.render_scheduler.fk_pending:
+            self.render_scheduler.flush()
+
     def update_fk(self):
         if not self.model.root: return
-        self._traverse_fk(self.model.root, QMatrix4x4(), self.scene_nodes, self.current_state)
+        if self.render_scheduler: self.render_scheduler.fk_pending = False
+        super().update_fk()
+        self._push_transforms(self.world_transforms, self.scene_nodes)
         if self.ghost_nodes:
-            self._traverse_fk(self.model.root, QMatrix4x4(), self.ghost_nodes, self.target_state)
+            self._push_transforms(self.ghost_transforms, self.ghost_nodes)
         self._update_collider_transforms()
 
-    def _traverse_fk(self, link, parent_matrix, node_map, state_dict):
-        global_mat = QMatrix4x4(parent_matrix)
-        if link.joint:
-            ox, oy, oz = link.joint.origin
-            global_mat.translate(ox, oy, oz)
-            
-            angle = 90.0
-            jid = str(link.joint.id)
-            if link.joint.id:
-                if jid in state_dict:
-                    angle = state_dict[jid]
-            
-            rot = angle - 90.0
-            ax, ay, az = link.joint.axis
-            global_mat.rotate(rot, ax, ay, az)
-
-        if node_map is self.scene_nodes: link.abs_transform = global_mat
-        if link.name in node_map: node_map[link.name].setTransform(global_mat)
-        
-        for child in link.children:
-            self._traverse_fk(child, global_mat, node_map, state_dict)
+    def _push_transforms(self, world, node_map):
+        """Uploads an (N, 4, 4) FK stack to the GL items (one per rigid body) in a single pass."""
+        rows = world.reshape(len(self.tree), 16).tolist()
+        for node in node_map.values():
+            node.setTransform(QMatrix4x4(rows[node.body_row]))
+
+    def link_matrix(self, link_name, ghost=False):
+        """World transform of a link from the last FK pass, as a QMatrix4x4."""
+        if link_name not in self.tree.index: return None
+        self._sync_fk()
+        world = self.ghost_transforms if ghost else self.world_transforms
+        return QMatrix4x4(world[self.tree.index[link_name]].reshape(16).tolist())
 
     def _update_collider_transforms(self):
-        for link_name, spheres in self.collision_engine.colliders.items():
-            if link_name not in self.model.links: continue
-            base = self.model.links[link_name].abs_transform
-            for i, s in enumerate(spheres):
-                k = f"{link_name}_{i}"
-                if k in self.collider_nodes:
-                    m = QMatrix4x4(base)
-                    m.translate(s.position)
-                    self.collider_nodes[k].setTransform(m)
-                    
-    def solve_ik(self, target_pos_list, end_link_name, iterations=30, tolerance=10.0):
-        if end_link_name not in self.model.links: return
-
-        # Ensure floats
-        tx, ty, tz = float(target_pos_list[0]), float(target_pos_list[1]), float(target_pos_list[2])
-        target_vec = QVector3D(tx, ty, tz)
-        end_link = self.model.links[end_link_name]
-
-        # 1. Build Chain
-        chain = []
-        curr = end_link
-        while curr.parent:
-            if curr.joint and curr.joint.id and curr.joint.type == "revolute":
-                chain.append(curr)
-            curr = curr.parent
-
-        # 2. Iterate
-        for _ in range(iterations):
-            self._traverse_fk(self.model.root, QMatrix4x4(), self.ghost_nodes, self.target_state)
-            
-            # Check Error
-            if end_link_name not in self.ghost_nodes: break
-            eff_node = self.ghost_nodes[end_link_name]
-            eff_pos = eff_node.transform().map(QVector3D(0.0, 0.0, 0.0))
-            
-            if eff_pos.distanceToPoint(target_vec) < tolerance:
-                break 
-
-            # 3. CCD Loop
-            for link in chain:
-                if link.name not in self.ghost_nodes: continue
-                
-                link_node = self.ghost_nodes[link.name]
-                link_transform = link_node.transform()
-                link_pos = link_transform.map(QVector3D(0.0, 0.0, 0.0))
-                
-                to_effector = (eff_pos - link_pos).normalized()
-                to_target = (target_vec - link_pos).normalized()
-                
-                dot = QVector3D.dotProduct(to_effector, to_target)
-                if dot > 0.9999: continue
+        if self.collider_layer:
+            self.collider_layer.set_centers(self.collision_engine.sphere_world)
 
-                angle_diff = math.degrees(math.acos(max(-1.0, min(1.0, dot))))
-                cross = QVector3D.crossProduct(to_effector, to_target)
-                
-                rot_matrix = QMatrix4x4(link_transform)
-                rot_matrix.setColumn(3, QVector4D(0,0,0,1)) 
-                
-                local_axis = QVector3D(float(link.joint.axis[0]), float(link.joint.axis[1]), float(link.joint.axis[2]))
-                world_axis = rot_matrix.map(local_axis).normalized()
-                
-                direction = 1 if QVector3D.dotProduct(cross, world_axis) > 0 else -1
-                
-                delta = angle_diff * direction * 0.2 
-                
-                jid = str(link.joint.id)
-                curr_angle = self.target_state.get(jid, 90.0)
-                new_angle = curr_angle + delta
-                
-                if link.joint.limits:
-                    new_angle = max(link.joint.limits[0], min(link.joint.limits[1], new_angle))
-                
-                self.target_state[jid] = new_angle
-                
-                self._traverse_fk(self.model.root, QMatrix4x4(), self.ghost_nodes, self.target_state)
-                eff_pos = eff_node.transform().map(QVector3D(0.0, 0.0, 0.0))
+    def link_position(self, link_name, ghost=False):
+        self._sync_fk()
+        return super().link_position(link_name, ghost)
 
-        self.current_state.update(self.target_state)
-        self.update_fk()
-        logger.info("IK Solution Applied")
\ No newline at end of file
+    def solve_ik(self, target_pos_list, end_link_name, iterations=30, tolerance=10.0, solver=None):
+        solver = solver or config_manager.get("ik_solver") or self.default_ik_solver
+        self._sync_fk()
+        return super().solve_ik(target_pos_list, end_link_name, iterations, tolerance, solver)
@@ -0,0 +1,67 @@
+import time
+import logging
+from PyQt6.QtCore import QObject, QTimer, Qt
+
+logger = logging.getLogger('inmoov_v13')
+
+class RenderScheduler(QObject):
+    """
+    Coalesces kinematic updates into at most one FK pass plus one repaint
+    per display frame. Producers (sliders, sequencer, telemetry) only mark
+    state dirty; a single-shot timer flushes it at the next frame slot.
+    """
+    def __init__(self, kinematics=None, viewport=None, target_fps=60):
+        super().__init__()
+        self.kinematics = kinematics
+        self.viewport = viewport
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.flush)
+
+        self.fk_pending = False
+        self.redraw_pending = False
+        self._last_frame = 0.0
+
+        # Stats
+        self.requests = 0
+        self.frames = 0
+        self.set_target_fps(target_fps)
+
+    def set_target_fps(self, fps):
+        self.target_fps = max(1.0, float(fps))
+        self.frame_interval = 1.0 / self.target_fps
+
+    def request_fk(self):
+        """Joint state changed: recompute FK (and redraw) once this frame."""
+        self.fk_pending = True
+        self._schedule()
+
+    def request_redraw(self):
+        self.redraw_pending = True
+        self._schedule()
+
+    def _schedule(self):
+        self.requests += 1
+        if self.timer.isActive(): return
+        wait = self._last_frame + self.frame_interval - time.perf_counter()
+        self.timer.start(max(0, int(wait * 1000)))
+
+    def flush(self):
+        """Runs any pending FK pass and repaint now."""
+        self.timer.stop()
+        if not (self.fk_pending or self.redraw_pending): return
+        self._last_frame = time.perf_counter()
+        self.frames += 1
+
+        if self.fk_pending:
+            self.fk_pending = False
+            if self.kinematics: self.kinematics.update_fk()
+            self.redraw_pending = True
+        if self.redraw_pending:
+            self.redraw_pending = False
+            if self.viewport: self.viewport.update_view()
+
+    def stats(self):
+        return {"requests": self.requests, "frames": self.frames, "target_fps": self.target_fps}
@@ -1,5 +1,6 @@
 import json
 import os
+import hashlib
 import logging
 from typing import Dict, List, Optional, Tuple, Any
 
@@ -61,6 +62,14 @@ class Link:
         self.visual = VisualData(data.get("visual", {}))
         self.parent: Optional['Link'] = None
         self.children: List['Link'] = []
+        # Incremental FK: set when this link's cached world transform is stale
+        self.fk_dirty = True
+
+    def mark_dirty(self):
+        """Flags this link and its whole subtree for an FK refresh."""
+        self.fk_dirty = True
+        for child in self.children:
+            child.mark_dirty()
 
     def to_dict(self):
         d = {
@@ -75,11 +84,17 @@ class Link:
         return d
 
 class RobotModel:
+    # Bump when the allowed-collision sampling changes to invalidate old caches
+    ACM_CACHE_VERSION = 3
+
     def __init__(self):
         self.links: Dict[str, Link] = {}
         self.root: Optional[Link] = None
         self.name = "Unknown"
         self.metadata = {}
+        self.file_path: Optional[str] = None
+        # {(link_a, link_b): reason} pairs that never need a runtime collision check
+        self.allowed_collisions: Optional[Dict[Tuple[str, str], str]] = None
 
     def load_from_file(self, file_path: str) -> bool:
         if not os.path.exists(file_path):
@@ -89,6 +104,7 @@ class RobotModel:
             with open(file_path, 'r') as f:
                 data = json.load(f)
             self.metadata = data.get("metadata", {})
+            self.file_path = file_path
             self.name = self.metadata.get("name", "Unknown")
             
             self.links.clear()
@@ -106,12 +122,43 @@ class RobotModel:
             root_name = data.get("root_link")
             if root_name in self.links:
                 self.root = self.links[root_name]
+                self._load_allowed_collisions(file_path, data)
                 return True
             return False
         except Exception as e:
             logger.error(f"Load failed: {e}")
             return False
 
+    def _load_allowed_collisions(self, file_path: str, data: dict):
+        """Reads the allowed-collision matrix cached next to the model JSON, rebuilding it if stale."""
+        from solver.collision import compute_allowed_collisions
+
+        key_src = json.dumps({"links": data.get("links", {}), "root": data.get("root_link"),
+                              "margin": self.metadata.get("safety_margin_mm")}, sort_keys=True)
+        key = hashlib.sha1(key_src.encode()).hexdigest()
+        cache_path = os.path.splitext(file_path)[0] + ".acm.json"
+
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r') as f:
+                    cached = json.load(f)
+                if cached.get("version") == self.ACM_CACHE_VERSION and cached.get("hash") == key:
+                    self.allowed_collisions = {(a, b): reason for a, b, reason in cached.get("pairs", [])}
+                    return
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable collision cache {cache_path}: {e}")
+
+        self.allowed_collisions = compute_allowed_collisions(self)
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump({
+                    "version": self.ACM_CACHE_VERSION,
+                    "hash": key,
+                    "pairs": [[a, b, reason] for (a, b), reason in sorted(self.allowed_collisions.items())]
+                }, f, indent=1)
+        except Exception as e:
+            logger.warning(f"Could not write collision cache {cache_path}: {e}")
+
     def save_to_file(self, file_path: str) -> bool:
         try:
             data = {
@@ -0,0 +1,5 @@
+from .kinematic_tree import KinematicTree
+from .kinematic_solver import KinematicSolver
+from .collision import CollisionEngine, compute_allowed_collisions
+from .trajectory import TrajectoryValidator, complete_frames
+from .safety import SafetyGate
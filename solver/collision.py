@@ -0,0 +1,310 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger('inmoov_v13')
+
+class CollisionEngine:
+    """
+    Sphere-swept self-collision model.
+
+    All spheres of the robot live in contiguous arrays: sphere_local (K, 3)
+    offsets in their link frame, sphere_radii (K,) and sphere_link (K,)
+    indices into link_names. Spheres of one link are stored back to back
+    (see link_spheres), and world positions come from a single batched
+    multiply against the FK transform stack.
+
+    check_collisions runs a broad phase first (one bounding sphere per link,
+    sweep-and-prune along the axis of largest spread) and only hands the
+    surviving link pairs to a vectorized sphere-vs-sphere narrow phase.
+    """
+    def __init__(self, robot_model):
+        self.model = robot_model
+        self.generate_colliders()
+        self.load_allowed_collisions(getattr(robot_model, 'allowed_collisions', None))
+
+    def generate_colliders(self):
+        margin = self.model.metadata.get("safety_margin_mm", 5.0)
+        local, radii, owner = [], [], []
+        self.link_names = []
+        self.link_spheres = {}  # {link_name: (first sphere index, sphere count)}
+        self._pair_index = {}
+        self._tree_key = None
+        
+        for link_name, link in self.model.links.items():
+            first = len(radii)
+            vis = link.visual
+            # Direction Logic
+            direction = -1.0 if vis.flip else 1.0
+            
+            if vis.method == "loft" or vis.method == "cylinder":
+                length = vis.length_mm
+                avg_radius = vis.radius
+                if vis.sections:
+                    s0 = vis.sections[0]
+                    # Robust radius extraction
+                    if "radius" in s0: avg_radius = s0["radius"]
+                    elif "radius_x" in s0: avg_radius = (s0["radius_x"] + s0["radius_y"])/2
+                
+                step = max(20.0, avg_radius * 1.2) 
+                num_spheres = int(length / step) + 1
+                
+                # APPLY FLIP HERE, clamping the last sphere to the link length
+                z = np.minimum(np.arange(num_spheres) * step, length) * direction
+                local.extend((0.0, 0.0, zi) for zi in z)
+                radii.extend([avg_radius + margin] * num_spheres)
+            
+            elif vis.method == "sphere":
+                local.append((0.0, 0.0, 0.0)); radii.append(vis.radius + margin)
+            
+            elif vis.method == "box":
+                w, h, d = vis.size
+                local.append((0.0, 0.0, 0.0)); radii.append((max(w, h, d) / 2) + margin)
+
+            count = len(radii) - first
+            if count:
+                owner.extend([len(self.link_names)] * count)
+                self.link_spheres[link_name] = (first, count)
+                self.link_names.append(link_name)
+
+        self.sphere_local = np.array(local, dtype=float).reshape(-1, 3)
+        self.sphere_radii = np.array(radii, dtype=float)
+        self.sphere_link = np.array(owner, dtype=np.int32)
+        self.sphere_world = np.zeros_like(self.sphere_local)
+
+        # Per-link bounding spheres for the broad phase
+        n = len(self.link_names)
+        self.link_index = {name: i for i, name in enumerate(self.link_names)}
+        self.bound_local = np.zeros((n, 3))
+        self.bound_radii = np.zeros(n)
+        for i, name in enumerate(self.link_names):
+            first, count = self.link_spheres[name]
+            centers = self.sphere_local[first:first + count]
+            self.bound_local[i] = centers.mean(axis=0)
+            self.bound_radii[i] = (np.linalg.norm(centers - self.bound_local[i], axis=1) + self.sphere_radii[first:first + count]).max()
+        self.bound_world = np.zeros((n, 3))
+        self.bound_valid = np.zeros(n, dtype=bool)
+
+        logger.info(f"Generated {len(self.sphere_radii)} collision spheres.")
+
+    def load_allowed_collisions(self, allowed):
+        """
+        Precomputes which link pairs are checked at runtime.
+        allowed: {(link_a, link_b): reason} from the model's allowed-collision
+        matrix; without one, only direct parent/child pairs are skipped.
+        """
+        n = len(self.link_names)
+        self._enabled = ~np.eye(n, dtype=bool)
+        if allowed is None:
+            allowed = {}
+            for name in self.link_names:
+                parent = self.model.links[name].parent_name
+                if parent: allowed[(name, parent)] = "adjacent"
+        for a, b in allowed:
+            if a in self.link_index and b in self.link_index:
+                i, j = self.link_index[a], self.link_index[b]
+                self._enabled[i, j] = self._enabled[j, i] = False
+        self._batch_pairs = self._build_sphere_pairs()
+        logger.info(f"Collision pairs enabled: {int(np.triu(self._enabled).sum())} of {n * (n - 1) // 2}")
+
+    def _tree_links(self, tree):
+        """FK-stack index of every collider link (-1 if absent), cached per compiled tree."""
+        if self._tree_key is not tree.names:
+            self._tree_rows = np.array([tree.index.get(n, -1) for n in self.link_names], dtype=np.int32)
+            self._tree_key = tree.names
+        return self._tree_rows
+
+    def sphere_positions(self, world, tree):
+        """World sphere centers for an (..., N, 4, 4) FK stack -> (..., K, 3)."""
+        rows = self._tree_links(tree)[self.sphere_link]
+        t = world[..., rows, :, :]
+        return np.einsum('...kij,kj->...ki', t[..., :3, :3], self.sphere_local) + t[..., :3, 3]
+
+    def update_collider_positions(self, kinematics_engine):
+        """Places every sphere using the engine's last measured FK stack."""
+        self.update_positions(kinematics_engine.world_transforms, kinematics_engine.tree)
+
+    def update_positions(self, world, tree):
+        """Places every sphere from an (N, 4, 4) FK stack."""
+        rows = self._tree_links(tree)
+        self.bound_valid = rows >= 0
+        if not self.bound_valid.any(): return
+
+        t = world[rows]
+        self.sphere_world = self.sphere_positions(world, tree)
+        self.bound_world = np.einsum('kij,kj->ki', t[:, :3, :3], self.bound_local) + t[:, :3, 3]
+
+    def check_collisions(self):
+        """Returns [(link_a, link_b), ...] for every intersecting link pair."""
+        candidates = self._broad_phase()
+        if not candidates: return []
+        return self._narrow_phase(candidates)
+
+    def _broad_phase(self):
+        """Enabled link pairs whose bounding spheres overlap (sweep-and-prune)."""
+        links = np.nonzero(self.bound_valid)[0]
+        if len(links) < 2: return []
+
+        centers = self.bound_world[links]
+        radii = self.bound_radii[links]
+
+        # Sweep along the axis where the links are most spread out
+        axis = int(np.argmax(centers.max(axis=0) - centers.min(axis=0)))
+        lo = centers[:, axis] - radii
+        hi = centers[:, axis] + radii
+        order = np.argsort(lo, kind='stable')
+        lo_sorted = lo[order]
+
+        # Every interval overlaps the ones that start before it ends
+        stop = np.searchsorted(lo_sorted, hi[order], side='right')
+        span = stop - np.arange(len(order)) - 1
+        first = np.repeat(np.arange(len(order)), span)
+        second = first + 1 + (np.arange(span.sum()) - np.repeat(np.cumsum(span) - span, span))
+        a, b = links[order[first]], links[order[second]]
+        if not len(a): return []
+
+        a, b = np.minimum(a, b), np.maximum(a, b)
+        gap = np.linalg.norm(self.bound_world[a] - self.bound_world[b], axis=1)
+        keep = self._enabled[a, b] & (gap < self.bound_radii[a] + self.bound_radii[b])
+
+        names = self.link_names
+        return [(names[i], names[j]) for i, j in sorted(zip(a[keep].tolist(), b[keep].tolist()))]
+
+    def _sphere_pairs(self, name_a, name_b):
+        """Packed sphere indices for every sphere of link a against every sphere of link b."""
+        key = (name_a, name_b)
+        if key not in self._pair_index:
+            sa, na = self.link_spheres[name_a]; sb, nb = self.link_spheres[name_b]
+            ia, ib = np.meshgrid(np.arange(sa, sa + na), np.arange(sb, sb + nb), indexing='ij')
+            self._pair_index[key] = (ia.ravel(), ib.ravel())
+        return self._pair_index[key]
+
+    def first_collision(self, positions, chunk=64):
+        """
+        Batched check over many poses.
+        positions: (M, K, 3) sphere centers (see sphere_positions).
+        Returns (pose_index, (link_a, link_b)) for the first colliding pose,
+        or None when all M poses are free.
+        """
+        ia, ib, owner, reach_sq = self._batch_pairs[:4]
+        if not len(ia): return None
+        for start in range(0, len(positions), chunk):
+            block = positions[start:start + chunk]
+            diff = block[:, ia] - block[:, ib]
+            hit = np.einsum('mpi,mpi->mp', diff, diff) < reach_sq
+            rows = np.nonzero(hit.any(axis=1))[0]
+            if len(rows):
+                a, b = owner[np.argmax(hit[rows[0]])]
+                return start + int(rows[0]), (self.link_names[a], self.link_names[b])
+        return None
+
+    def pair_depths(self, positions):
+        """
+        Deepest sphere overlap (mm) of every enabled link pair.
+        positions: (M, K, 3) sphere centers. Returns (links, depths): links
+        is (P, 2) link indices, depths (M, P) is negative where a pair is clear.
+        """
+        ia, ib, owner, reach_sq, starts = self._batch_pairs
+        if not len(ia): return owner, np.zeros((len(positions), 0))
+        diff = positions[:, ia] - positions[:, ib]
+        depth = np.sqrt(reach_sq) - np.sqrt(np.einsum('mpi,mpi->mp', diff, diff))
+        return owner[starts], np.maximum.reduceat(depth, starts, axis=1)
+
+    def _build_sphere_pairs(self):
+        """
+        Sphere index pairs for every enabled link pair, grouped by link pair
+        in row-major order: (ia, ib, owner link pairs, squared reach, group starts).
+        """
+        la, lb = self.sphere_link[:, None], self.sphere_link[None, :]
+        ia, ib = np.nonzero(self._enabled[la, lb] & (la < lb))
+        order = np.lexsort((ib, ia, self.sphere_link[ib], self.sphere_link[ia]))
+        ia, ib = ia[order], ib[order]
+        owner = np.stack([self.sphere_link[ia], self.sphere_link[ib]], axis=1)
+        new_group = np.ones(len(ia), dtype=bool)
+        new_group[1:] = (owner[1:] != owner[:-1]).any(axis=1)
+        return ia, ib, owner, (self.sphere_radii[ia] + self.sphere_radii[ib]) ** 2, np.nonzero(new_group)[0]
+
+    def _narrow_phase(self, link_pairs):
+        """Vectorized sphere-vs-sphere test over all candidate link pairs at once."""
+        index = [self._sphere_pairs(a, b) for a, b in link_pairs]
+        ia = np.concatenate([i for i, _ in index])
+        ib = np.concatenate([j for _, j in index])
+        owner = np.repeat(np.arange(len(link_pairs)), [len(i) for i, _ in index])
+
+        diff = self.sphere_world[ia] - self.sphere_world[ib]
+        reach = self.sphere_radii[ia] + self.sphere_radii[ib]
+        hit = np.einsum('ij,ij->i', diff, diff) < reach * reach
+        return [link_pairs[k] for k in np.unique(owner[hit])]
+
+
+def compute_allowed_collisions(robot_model, samples=2000, seed=0, always_ratio=0.95, clearance=150.0, chunk=100):
+    """
+    Builds the allowed-collision matrix for a robot: {(link_a, link_b): reason}.
+
+    Seeded from the tree topology ("adjacent" parent/child pairs and "rigid"
+    pairs with no actuated joint between them) and the pairs that already
+    overlap in the neutral pose ("default"), then refined by sampling
+    random poses within the joint limits: pairs that collide in nearly every
+    sample are marked "always", pairs that never came closer than clearance
+    (mm between sphere surfaces) are marked "never".
+    Only the remaining pairs need to be checked at runtime.
+    """
+    from .kinematic_tree import KinematicTree
+    tree = KinematicTree(robot_model)
+    engine = CollisionEngine(robot_model)
+
+    links = [n for n in engine.link_names if n in tree.index]
+    allowed = {}
+
+    # 1. Topology: links joined by fixed joints form one rigid body
+    body = tree.body
+    for ia in range(len(links)):
+        for ib in range(ia + 1, len(links)):
+            a, b = links[ia], links[ib]
+            if robot_model.links[a].parent_name == b or robot_model.links[b].parent_name == a:
+                allowed[(a, b)] = "adjacent"
+            elif body[tree.index[a]] == body[tree.index[b]]:
+                allowed[(a, b)] = "rigid"
+
+    # 2. Pairs already touching in the neutral (all 90 deg) pose are by design
+    engine.load_allowed_collisions(allowed)
+    engine.update_positions(tree.forward(tree.angles_from_state({})), tree)
+    for pair in engine.check_collisions():
+        allowed.setdefault(pair, "default")
+
+    # 3. Sampling over the remaining pairs
+    candidates = [(links[i], links[j]) for i in range(len(links)) for j in range(i + 1, len(links))
+                  if (links[i], links[j]) not in allowed]
+    if not candidates or not tree.joint_names:
+        return allowed
+
+    index = [engine._sphere_pairs(a, b) for a, b in candidates]
+    ia = np.concatenate([i for i, _ in index]); ib = np.concatenate([j for _, j in index])
+    starts = np.concatenate([[0], np.cumsum([len(i) for i, _ in index])[:-1]])
+    reach_sq = (engine.sphere_radii[ia] + engine.sphere_radii[ib]) ** 2
+
+    lo = np.zeros(len(tree.joint_names)); hi = np.full(len(tree.joint_names), 180.0)
+    for i, jid in tree.actuated:
+        c = tree.joint_column[jid]
+        if np.isfinite(tree.limits[i, 0]): lo[c] = max(lo[c], tree.limits[i, 0])
+        if np.isfinite(tree.limits[i, 1]): hi[c] = min(hi[c], tree.limits[i, 1])
+    hi = np.maximum(hi, lo)
+
+    rng = np.random.default_rng(seed)
+    reach = np.sqrt(reach_sq)
+    hits = np.zeros(len(candidates), dtype=np.int64)
+    closest = np.full(len(candidates), np.inf)
+    for done in range(0, samples, chunk):
+        m = min(chunk, samples - done)
+        pos = engine.sphere_positions(tree.forward(tree.angles_from_joints(rng.uniform(lo, hi, (m, len(lo))))), tree)
+        gap = np.linalg.norm(pos[:, ia] - pos[:, ib], axis=2) - reach
+        hits += np.logical_or.reduceat(gap < 0, starts, axis=1).sum(axis=0)
+        closest = np.minimum(closest, np.minimum.reduceat(gap, starts, axis=1).min(axis=0))
+
+    # Random sampling misses rare contacts, so "never" also demands a clearance margin
+    for pair, count, gap in zip(candidates, hits, closest):
+        if count == 0 and gap > clearance: allowed[pair] = "never"
+        elif count >= always_ratio * samples: allowed[pair] = "always"
+
+    logger.info(f"Allowed-collision matrix: {len(allowed)} pairs disabled, "
+                f"{len(candidates) - sum(1 for p in candidates if p in allowed)} left to check ({samples} samples)")
+    return allowed
@@ -0,0 +1,217 @@
+import numpy as np
+import logging
+import math
+from .kinematic_tree import KinematicTree
+from .collision import CollisionEngine
+
+logger = logging.getLogger('inmoov_v13')
+
+class KinematicSolver:
+    """
+    Headless kinematics core: joint state, FK stacks, IK and collision
+    model for a RobotModel, using NumPy only (no Qt, no OpenGL).
+    GUI front-ends subclass it and mirror update_fk() into their scene.
+    """
+    def __init__(self, robot_model):
+        self.model = robot_model
+        self.current_state = {} 
+        self.target_state = {}
+        self.default_ik_solver = "ccd"
+        
+        self.tree = KinematicTree(self.model)
+        self.world_transforms = self.tree.forward(self.tree.angles_from_state(self.current_state))
+        self.ghost_transforms = self.world_transforms.copy()
+        
+        self.collision_engine = CollisionEngine(self.model)
+
+    def update_state_from_sensors(self, sensor_data):
+        self.current_state.update({str(k): float(v) for k, v in sensor_data.items()})
+        self._state_changed()
+
+    def set_target_pose(self, pose_data):
+        clean = {str(k): float(v) for k, v in pose_data.items()}
+        self.target_state.update(clean)
+        self.current_state.update(clean) 
+        self._state_changed()
+
+    def _state_changed(self):
+        """Joint state was updated; headless use recomputes FK right away."""
+        self.update_fk()
+
+    def update_fk(self):
+        """Recomputes the measured (world) and target (ghost) FK stacks."""
+        if not self.model.root: return
+        self.world_transforms = self.tree.forward(self.tree.angles_from_state(self.current_state))
+        self.ghost_transforms = self.tree.forward(self.tree.angles_from_state(self.target_state))
+        self.collision_engine.update_collider_positions(self)
+
+    @property
+    def joint_order(self):
+        """Column order used by forward_batch (hardware joint IDs)."""
+        return list(self.tree.joint_names)
+
+    def forward_batch(self, joint_angles, joint_ids=None):
+        """
+        Offline FK for many poses at once.
+        joint_angles: (M, J) degrees, columns ordered like joint_ids
+        (default: joint_order). Returns (M, N, 4, 4) link transforms in
+        tree.names order. Does not touch the live joint state.
+        """
+        q = np.asarray(joint_angles, dtype=float)
+        if q.ndim != 2:
+            raise ValueError(f"forward_batch expects an (M, J) array, got shape {q.shape}")
+        return self.tree.forward(self.tree.angles_from_joints(q, joint_ids))
+
+    def link_position(self, link_name, ghost=False):
+        """World position (x, y, z) of a link origin from the last FK pass."""
+        if link_name not in self.tree.index: return None
+        world = self.ghost_transforms if ghost else self.world_transforms
+        return tuple(float(v) for v in self.tree.position(world, link_name))
+
+    def solve_ik(self, target_pos_list, end_link_name, iterations=30, tolerance=10.0, solver=None):
+        """
+        Drives the ghost so that end_link_name reaches target_pos_list (mm).
+        solver: "ccd" or "dls" (damped least squares); defaults to
+        default_ik_solver. Returns a dict with the solver used,
+        convergence flag, iteration count and residual history (mm).
+        """
+        if end_link_name not in self.tree.index: return None
+
+        # Ensure floats
+        target = np.array([float(v) for v in target_pos_list[:3]])
+        end_idx = self.tree.index[end_link_name]
+        chain = self._ik_chain(end_idx)
+        solver = solver or self.default_ik_solver
+
+        if solver == "dls":
+            residuals = self._solve_dls(target, end_idx, chain, iterations, tolerance)
+        else:
+            residuals = self._solve_ccd(target, end_idx, chain, iterations, tolerance)
+
+        self.current_state.update(self.target_state)
+        self.update_fk()
+
+        result = {
+            "solver": solver,
+            "converged": residuals[-1] < tolerance,
+            "iterations": len(residuals) - 1,
+            "residual": residuals[-1],
+            "residuals": residuals
+        }
+        logger.info(f"IK Solution Applied ({solver}: {result['iterations']} iterations, residual {result['residual']:.1f} mm)")
+        return result
+
+    def _ik_chain(self, end_idx):
+        """Actuated revolute links between the root and end_idx, end first."""
+        tree = self.tree
+        chain = []
+        curr = end_idx
+        while tree.parents[curr] >= 0:
+            if tree.joint_ids[curr] and tree.is_revolute[curr]:
+                chain.append(curr)
+            curr = tree.parents[curr]
+        return chain
+
+    def _set_joint(self, angles, jid, value):
+        self.target_state[jid] = value
+        # Links that share this hardware ID move together
+        for j, other in self.tree.actuated:
+            if other == jid and angles[j] != value:
+                angles[j] = value
+                self.tree.links[j].mark_dirty()
+
+    def _solve_ccd(self, target, end_idx, chain, iterations, tolerance):
+        tree = self.tree
+        angles = tree.angles_from_state(self.target_state)
+        residuals = []
+
+        # Only the root -> end-effector path is refreshed per joint tweak
+        scope = tree.path_to(end_idx)
+        world = tree.forward(angles)
+        tree.mark_clean()
+
+        for _ in range(iterations):
+            # Check Error
+            eff_pos = world[end_idx, :3, 3].copy()
+            residuals.append(float(np.linalg.norm(target - eff_pos)))
+            if residuals[-1] < tolerance:
+                return residuals
+
+            for i in chain:
+                link_pos = world[i, :3, 3]
+                
+                to_effector = eff_pos - link_pos
+                to_target = target - link_pos
+                n_eff = np.linalg.norm(to_effector); n_tgt = np.linalg.norm(to_target)
+                if n_eff < 1e-9 or n_tgt < 1e-9: continue
+                to_effector /= n_eff; to_target /= n_tgt
+                
+                dot = float(np.dot(to_effector, to_target))
+                if dot > 0.9999: continue
+
+                angle_diff = math.degrees(math.acos(max(-1.0, min(1.0, dot))))
+                cross = np.cross(to_effector, to_target)
+                world_axis = world[i, :3, :3] @ tree.axes[i]
+                
+                direction = 1 if np.dot(cross, world_axis) > 0 else -1
+                
+                delta = angle_diff * direction * 0.2 
+                
+                jid = tree.joint_ids[i]
+                lo, hi = tree.limits[i]
+                self._set_joint(angles, jid, min(hi, max(lo, self.target_state.get(jid, 90.0) + delta)))
+                
+                tree.refresh(world, angles, scope)
+                eff_pos = world[end_idx, :3, 3].copy()
+
+        residuals.append(float(np.linalg.norm(target - world[end_idx, :3, 3])))
+        return residuals
+
+    def _solve_dls(self, target, end_idx, chain, iterations, tolerance, damping=2.0, max_step=15.0):
+        """Damped least squares on the analytic position Jacobian, clamped to joint limits."""
+        tree = self.tree
+        ids = list(dict.fromkeys(tree.joint_ids[i] for i in chain))
+        residuals = []
+        if not ids:
+            residuals.append(float(np.linalg.norm(target - tree.forward(tree.angles_from_state(self.target_state))[end_idx, :3, 3])))
+            return residuals
+
+        cols = np.array([ids.index(tree.joint_ids[i]) for i in chain])
+        lo = np.full(len(ids), -np.inf); hi = np.full(len(ids), np.inf)
+        for i, c in zip(chain, cols):
+            lo[c] = max(lo[c], tree.limits[i, 0]); hi[c] = min(hi[c], tree.limits[i, 1])
+
+        angles = tree.angles_from_state(self.target_state)
+        q = np.clip([self.target_state.get(jid, 90.0) for jid in ids], lo, hi)
+        damp = np.eye(3) * damping ** 2
+
+        scope = tree.path_to(end_idx)
+        world = tree.forward(angles)
+        tree.mark_clean()
+
+        for _ in range(iterations + 1):
+            for jid, v in zip(ids, q): self._set_joint(angles, jid, float(v))
+            tree.refresh(world, angles, scope)
+            eff_pos = world[end_idx, :3, 3]
+            err = target - eff_pos
+            residuals.append(float(np.linalg.norm(err)))
+            if residuals[-1] < tolerance or len(residuals) > iterations: break
+
+            jac = tree.position_jacobian(world, chain, eff_pos, cols, len(ids))
+
+            # Joints pinned at a limit and pushing outward are dropped and the step re-solved
+            free = np.ones(len(ids), dtype=bool)
+            for _ in range(len(ids)):
+                jf = jac[:, free]
+                dq = np.zeros(len(ids))
+                dq[free] = jf.T @ np.linalg.solve(jf @ jf.T + damp, err)
+                pinned = free & (((q <= lo) & (dq < 0)) | ((q >= hi) & (dq > 0)))
+                if not pinned.any(): break
+                free &= ~pinned
+                if not free.any(): break
+
+            peak = np.abs(dq).max()
+            if peak > max_step: dq *= max_step / peak
+            q = np.clip(q + dq, lo, hi)
+
+        return residuals
@@ -0,0 +1,198 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger('inmoov_v13')
+
+class KinematicTree:
+    """
+    Compiled, array-backed view of a RobotModel link graph.
+
+    Links are stored in depth-first order, so every parent precedes its
+    children. Joint origins, axes and limits live in contiguous NumPy arrays
+    and forward kinematics for the whole robot is evaluated as one batched
+    (N, 4, 4) transform stack, composed level by level. Any leading batch
+    dimensions on the angle array are carried through, so M poses come back
+    as an (M, N, 4, 4) stack from the same call.
+    """
+
+    NEUTRAL_ANGLE = 90.0
+
+    def __init__(self, robot_model):
+        self.model = robot_model
+        self.compile()
+
+    def compile(self):
+        """(Re)builds the arrays from the current link graph."""
+        order = []
+        if self.model.root:
+            stack = [self.model.root]
+            while stack:
+                link = stack.pop()
+                order.append(link)
+                stack.extend(reversed(link.children))
+
+        n = len(order)
+        self.links = order
+        self.names = [l.name for l in order]
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        self.parents = np.full(n, -1, dtype=np.int32)
+        self.depths = np.zeros(n, dtype=np.int32)
+        self.origins = np.zeros((n, 3))
+        self.axes = np.zeros((n, 3))
+        self.limits = np.tile([-np.inf, np.inf], (n, 1))
+        self.is_revolute = np.zeros(n, dtype=bool)
+        self.is_fixed = np.ones(n, dtype=bool)  # no joint counts as fixed
+        self.joint_ids = [None] * n
+
+        for i, link in enumerate(order):
+            if link.parent is not None and link.parent.name in self.index:
+                p = self.index[link.parent.name]
+                self.parents[i] = p
+                self.depths[i] = self.depths[p] + 1
+
+            joint = link.joint
+            if not joint: continue
+
+            self.origins[i] = [float(v) for v in joint.origin]
+            axis = np.array([float(v) for v in joint.axis])
+            norm = np.linalg.norm(axis)
+            if norm > 0: self.axes[i] = axis / norm
+            if joint.limits: self.limits[i] = [float(joint.limits[0]), float(joint.limits[1])]
+            self.is_revolute[i] = (joint.type == "revolute")
+            self.is_fixed[i] = (joint.type == "fixed")
+            if joint.id and not self.is_fixed[i]: self.joint_ids[i] = str(joint.id)
+
+        # Links sharing a depth are independent of each other -> one matmul per level
+        max_depth = int(self.depths.max()) if n else 0
+        self.levels = [np.nonzero(self.depths == d)[0] for d in range(max_depth + 1)]
+        self.actuated = [(i, jid) for i, jid in enumerate(self.joint_ids) if jid is not None]
+
+        # Hardware IDs can drive several links (e.g. finger segments): one column per ID
+        self.joint_names = list(dict.fromkeys(jid for _, jid in self.actuated))
+        self.joint_column = {jid: c for c, jid in enumerate(self.joint_names)}
+        self._act_links = np.array([i for i, _ in self.actuated], dtype=np.int32)
+        self._act_cols = np.array([self.joint_column[jid] for _, jid in self.actuated], dtype=np.int32)
+        self._no_axis = ~self.axes.any(axis=1)
+
+        # Rigid bodies: links on fixed joints join their parent's body
+        self.body = np.arange(n, dtype=np.int32)
+        for i in range(n):
+            p = self.parents[i]
+            if p >= 0 and self.is_fixed[i]: self.body[i] = self.body[p]
+
+        logger.debug(f"Compiled kinematic tree: {n} links, {len(self.actuated)} actuated")
+
+    def __len__(self):
+        return len(self.names)
+
+    def angles_from_state(self, state_dict, out=None):
+        """Per-link joint angles (deg) from a {joint_id: angle} dict."""
+        angles = out if out is not None else np.empty(len(self.names))
+        angles.fill(self.NEUTRAL_ANGLE)
+        for i, jid in self.actuated:
+            if jid in state_dict:
+                angles[i] = state_dict[jid]
+        return angles
+
+    def angles_from_joints(self, joint_angles, joint_ids=None):
+        """
+        Per-link angles from an (..., J) joint matrix.
+        Columns follow joint_ids (default: self.joint_names); joints that are
+        not listed stay at the neutral angle.
+        """
+        q = np.asarray(joint_angles, dtype=float)
+        if joint_ids is None:
+            joint_ids = self.joint_names
+            cols = self._act_cols
+        else:
+            lookup = {str(jid): c for c, jid in enumerate(joint_ids)}
+            cols = np.array([lookup.get(jid, -1) for _, jid in self.actuated], dtype=np.int32)
+        if q.shape[-1] != len(joint_ids):
+            raise ValueError(f"Expected {len(joint_ids)} joint columns, got array of shape {q.shape}")
+
+        angles = np.full(q.shape[:-1] + (len(self.names),), self.NEUTRAL_ANGLE)
+        known = cols >= 0
+        angles[..., self._act_links[known]] = q[..., cols[known]]
+        return angles
+
+    def local_transforms(self, angles, idx=None):
+        """
+        Joint-local transforms: translate(origin) * rotate(angle - 90, axis).
+        With idx, angles holds values for those links only.
+        """
+        if idx is None: idx = slice(None)
+        axes, origins, no_axis = self.axes[idx], self.origins[idx], self._no_axis[idx]
+        theta = np.radians(np.asarray(angles, dtype=float) - self.NEUTRAL_ANGLE)
+        c = np.cos(theta); s = np.sin(theta); t = 1.0 - c
+        x, y, z = axes[:, 0], axes[:, 1], axes[:, 2]
+
+        local = np.zeros(theta.shape + (4, 4))
+        local[..., 0, 0] = c + x * x * t
+        local[..., 0, 1] = x * y * t - z * s
+        local[..., 0, 2] = x * z * t + y * s
+        local[..., 1, 0] = y * x * t + z * s
+        local[..., 1, 1] = c + y * y * t
+        local[..., 1, 2] = y * z * t - x * s
+        local[..., 2, 0] = z * x * t - y * s
+        local[..., 2, 1] = z * y * t + x * s
+        local[..., 2, 2] = c + z * z * t
+        local[..., :3, 3] = origins
+        local[..., 3, 3] = 1.0
+
+        # Links without a usable axis keep only their origin offset
+        if no_axis.any():
+            local[..., no_axis, :3, :3] = np.eye(3)
+        return local
+
+    def forward(self, angles):
+        """World transforms for every link as an (..., N, 4, 4) stack."""
+        world = self.local_transforms(angles)
+        for level in self.levels[1:]:
+            world[..., level, :, :] = world[..., self.parents[level], :, :] @ world[..., level, :, :]
+        return world
+
+    def path_to(self, idx):
+        """Indices from the root down to idx (ascending, i.e. topological)."""
+        path = []
+        while idx >= 0:
+            path.append(idx)
+            idx = self.parents[idx]
+        return path[::-1]
+
+    def mark_clean(self):
+        """Declares a freshly computed full FK stack as the incremental cache."""
+        for link in self.links: link.fk_dirty = False
+
+    def refresh(self, world, angles, scope=None):
+        """
+        Incremental FK on a cached (N, 4, 4) stack, in place.
+        Only links whose Link.fk_dirty flag is set are recomputed, optionally
+        restricted to scope (e.g. the root -> end-effector path); clean
+        ancestors are reused as-is. Returns the number of links recomputed.
+        """
+        candidates = range(len(self.links)) if scope is None else scope
+        dirty = [i for i in candidates if self.links[i].fk_dirty]
+        if not dirty: return 0
+
+        local = self.local_transforms(angles[dirty], dirty)
+        for k, i in enumerate(dirty):
+            p = self.parents[i]
+            world[i] = world[p] @ local[k] if p >= 0 else local[k]
+            self.links[i].fk_dirty = False
+        return len(dirty)
+
+    def position_jacobian(self, world, chain, eff_pos, cols, n_cols):
+        """
+        Geometric position Jacobian (3, n_cols) in mm/deg for the revolute
+        links in chain; links mapped to the same column (shared IDs) add up.
+        """
+        pos = world[chain, :3, 3]
+        axes = np.einsum('kij,kj->ki', world[chain, :3, :3], self.axes[chain])
+        contrib = np.radians(1.0) * np.cross(axes, eff_pos - pos)
+        jac = np.zeros((n_cols, 3))
+        np.add.at(jac, cols, contrib)
+        return jac.T
+
+    def position(self, world, name):
+        return world[self.index[name], :3, 3]
@@ -0,0 +1,102 @@
+import numpy as np
+import logging
+import time
+
+logger = logging.getLogger('inmoov_v13')
+
+class SafetyGate:
+    """
+    Pre-command collision check for proposed joint targets.
+
+    A proposed change is merged into the solver's current pose and both
+    poses are run through FK and the sphere model together. The change is
+    rejected if it makes an enabled link pair overlap that was clear, or
+    pushes an overlapping pair deeper (by more than tolerance_mm), so a
+    robot that already collides can still be moved apart. The check never
+    touches the solver's own FK/collider state, so it can run ahead of the
+    UI. Each check has a latency budget: if FK alone overruns it, the pose
+    is rejected without finishing (fail closed); a completed check that
+    lands late is kept but counted in the timing stats.
+    """
+    def __init__(self, solver=None, budget_ms=5.0, tolerance_mm=0.01):
+        self.solver = solver
+        self.budget_ms = budget_ms
+        self.tolerance_mm = tolerance_mm
+        self.enabled = True
+        self._last = None  # (pose key, result) so the same pose is not checked twice
+        self.reset_stats()
+
+    def invalidate(self):
+        """Drops the cached result after the solver or collision model changed."""
+        self._last = None
+
+    def reset_stats(self):
+        self.checks = 0
+        self.blocked = 0
+        self.over_budget = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self._total_ms = 0.0
+
+    def stats(self):
+        return {
+            "checks": self.checks,
+            "blocked": self.blocked,
+            "over_budget": self.over_budget,
+            "last_ms": self.last_ms,
+            "max_ms": self.max_ms,
+            "avg_ms": self._total_ms / self.checks if self.checks else 0.0,
+            "budget_ms": self.budget_ms
+        }
+
+    def allow(self, changes):
+        return self.check(changes)["ok"]
+
+    def check(self, changes):
+        """
+        changes: {joint_id: angle} on top of the solver's current pose.
+        Returns {"ok", "links", "reason", "elapsed_ms"}; reason is None,
+        "collision" or "budget".
+        """
+        if not self.enabled or self.solver is None:
+            return {"ok": True, "links": None, "reason": None, "elapsed_ms": 0.0}
+
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000.0
+        tree = self.solver.tree
+        pose = dict(self.solver.current_state)
+        pose.update({str(k): float(v) for k, v in changes.items()})
+        angles = np.stack([tree.angles_from_state(self.solver.current_state), tree.angles_from_state(pose)])
+
+        key = (id(self.solver), angles.tobytes())
+        if self._last is not None and self._last[0] == key:
+            return self._last[1]
+
+        result = {"ok": True, "links": None, "reason": None}
+        world = tree.forward(angles)
+        if time.perf_counter() > deadline:
+            result.update({"ok": False, "reason": "budget"})
+        else:
+            ce = self.solver.collision_engine
+            links, depth = ce.pair_depths(ce.sphere_positions(world, tree))
+            before, after = depth
+            worse = (after > 0) & ((before <= 0) | (after > before + self.tolerance_mm))
+            if worse.any():
+                a, b = links[np.argmax(np.where(worse, after - np.maximum(before, 0), -np.inf))]
+                result.update({"ok": False, "links": (ce.link_names[a], ce.link_names[b]), "reason": "collision"})
+
+        elapsed = (time.perf_counter() - start) * 1000.0
+        result["elapsed_ms"] = elapsed
+        self.checks += 1
+        self.last_ms = elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+        self._total_ms += elapsed
+        if elapsed > self.budget_ms:
+            self.over_budget += 1
+            logger.warning(f"Safety check took {elapsed:.2f} ms (budget {self.budget_ms:.2f} ms)")
+        if not result["ok"]:
+            self.blocked += 1
+            logger.warning(f"Safety gate blocked pose: {result['reason']} {result['links'] or ''}")
+
+        if result["reason"] != "budget": self._last = (key, result)
+        return result
@@ -0,0 +1,109 @@
+import numpy as np
+import logging
+import math
+import time
+
+logger = logging.getLogger('inmoov_v13')
+
+def complete_frames(frames, start_state, joint_ids):
+    """
+    Full copies of keyframes: a joint a frame leaves out keeps its value
+    from the frame before, and the first frame's from start_state (90 deg
+    if unknown there too).
+    """
+    pose = {j: float(start_state.get(j, 90.0)) for j in joint_ids}
+    out = []
+    for f in frames:
+        pose = dict(pose)
+        pose.update({str(k): float(v) for k, v in f.items()})
+        out.append(pose)
+    return out
+
+class TrajectoryValidator:
+    """
+    Continuous collision check for keyframe animations.
+
+    Mirrors SequencerPanel playback: consecutive frames are blended with a
+    cosine ease, joints missing from a frame hold their previous value (see
+    complete_frames). Each segment is sampled so that no joint moves more
+    than max_step_deg between samples, all samples go through one batched
+    FK + sphere check, and the first hit is bisected down to the moment of
+    contact.
+    """
+    def __init__(self, solver, max_step_deg=2.0, refine_steps=8, chunk=64):
+        self.solver = solver
+        self.max_step_deg = max_step_deg
+        self.refine_steps = refine_steps
+        self.chunk = chunk
+
+    def validate(self, frames, smooth=True, loop=False):
+        """
+        Returns {"ok": True, ...} or, on contact, {"ok": False, "segment": i,
+        "t": fraction of segment i -> i+1 (playback time), "links": (a, b),
+        "pose": {joint_id: angle}}. Both carry "samples" and "elapsed_ms".
+        With loop, the wrap from the last frame back to the first is checked
+        too, as segment len(frames) - 1.
+        """
+        start = time.perf_counter()
+        ids = self.solver.joint_order
+        full = complete_frames(frames, self.solver.current_state, ids)
+        keys = np.array([[f[j] for j in ids] for f in full]).reshape(len(frames), len(ids))
+
+        poses, segment, progress = [], [], []
+        segments = len(frames) if loop else len(frames) - 1
+        if smooth and len(frames) > 1:
+            for i in range(segments):
+                a, b = keys[i], keys[(i + 1) % len(frames)]
+                n = max(1, int(math.ceil(np.abs(b - a).max(initial=0.0) / self.max_step_deg)))
+                p = np.linspace(0.0, 1.0, n + 1)
+                poses.append(a + (b - a) * p[:, None])
+                segment.append(np.full(n + 1, i)); progress.append(p)
+        else:
+            poses.append(keys)
+            segment.append(np.arange(len(frames))); progress.append(np.zeros(len(frames)))
+
+        result = {"ok": True, "samples": 0}
+        if len(frames) and len(ids):
+            q = np.concatenate(poses); segment = np.concatenate(segment); progress = np.concatenate(progress)
+            result["samples"] = len(q)
+            hit = self._first_hit(q)
+            if hit is not None:
+                idx, links = hit
+                seg, p, pose = int(segment[idx]), float(progress[idx]), q[idx]
+                if smooth and idx > 0 and segment[idx - 1] == seg:
+                    p, pose, links = self._refine(keys[seg], keys[(seg + 1) % len(frames)], float(progress[idx - 1]), p, links)
+                result.update({
+                    "ok": False,
+                    "segment": seg,
+                    "t": math.acos(1.0 - 2.0 * p) / math.pi if smooth else 0.0,
+                    "links": links,
+                    "pose": dict(zip(ids, (float(v) for v in pose)))
+                })
+
+        result["elapsed_ms"] = (time.perf_counter() - start) * 1000.0
+        if not result["ok"]:
+            logger.warning(f"Trajectory collision {result['links']} in segment {result['segment']} at t={result['t']:.2f}")
+        return result
+
+    def _first_hit(self, q):
+        tree = self.solver.tree
+        ce = self.solver.collision_engine
+        for start in range(0, len(q), self.chunk):
+            world = tree.forward(tree.angles_from_joints(q[start:start + self.chunk]))
+            hit = ce.first_collision(ce.sphere_positions(world, tree), chunk=self.chunk)
+            if hit is not None:
+                return start + hit[0], hit[1]
+        return None
+
+    def _refine(self, a, b, p_free, p_hit, links):
+        """Bisects the eased path between a free and a colliding sample."""
+        pose = a + (b - a) * p_hit
+        for _ in range(self.refine_steps):
+            mid = 0.5 * (p_free + p_hit)
+            q = a + (b - a) * mid
+            hit = self._first_hit(q[None])
+            if hit is None:
+                p_free = mid
+            else:
+                p_hit, pose, links = mid, q, hit[1]
+        return p_hit, pose, links
@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+import pytest
+
+from core.robot_loader import RobotModel
+from solver import KinematicSolver
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "robots", "inmoov_standard.json")
+
+
+@pytest.fixture(scope="session")
+def model():
+    m = RobotModel()
+    assert m.load_from_file(MODEL_PATH)
+    return m
+
+
+@pytest.fixture
+def random_state(model):
+    """random_state(seed) -> {joint id: angle} drawn uniformly within the joint limits."""
+    def make(seed):
+        rng = np.random.default_rng(seed)
+        state = {}
+        for link in model.links.values():
+            if link.joint and link.joint.id:
+                lo, hi = link.joint.limits
+                state[str(link.joint.id)] = float(rng.uniform(lo, hi))
+        return state
+    return make
+
+
+@pytest.fixture
+def colliding_state(model, random_state):
+    """A random pose with at least one enabled link pair in contact."""
+    solver = KinematicSolver(model)
+    for seed in range(50):
+        state = random_state(seed)
+        solver.update_state_from_sensors(state)
+        if solver.collision_engine.check_collisions(): return state
+    raise AssertionError("no colliding pose found")
@@ -0,0 +1,51 @@
+from communication.binary_protocol import BinaryProtocol, FrameDecoder
+
+
+def test_round_trip():
+    frames = [
+        BinaryProtocol.encode_servos(3, [("SERVO1", 45), ("SERVO4", 180)]),
+        BinaryProtocol.encode_motors("D", [("MOTOR1A", -50), ("MOTOR2B", 100)]),
+        BinaryProtocol.encode_port_command(BinaryProtocol.OP_READ_POTS, 7),
+    ]
+    expected = [
+        (BinaryProtocol.OP_SET_SERVOS, bytes((3, 2, 0, 45, 3, 180))),
+        (BinaryProtocol.OP_SET_MOTORS, bytes((0xFF, 2, 0, (-50) & 0xFF, 3, 100))),
+        (BinaryProtocol.OP_READ_POTS, bytes((7,))),
+    ]
+    assert FrameDecoder().feed(b"".join(frames)) == expected
+
+    # Same stream one byte at a time
+    decoder = FrameDecoder()
+    out = []
+    for b in b"".join(frames): out += decoder.feed(bytes((b,)))
+    assert out == expected
+    assert decoder.crc_errors == 0
+
+
+def test_crc_mismatch_is_rejected():
+    frame = bytearray(BinaryProtocol.encode_servos(0, [("SERVO2", 90)]))
+    frame[-2] ^= 0x01
+    decoder = FrameDecoder()
+    assert decoder.feed(bytes(frame)) == []
+    assert decoder.crc_errors == 1
+
+
+def test_resyncs_on_next_sync_byte():
+    good = BinaryProtocol.encode_servos(1, [("SERVO3", 120)])
+    corrupt = bytearray(BinaryProtocol.encode_motors(2, [("MOTOR1B", 30)]))
+    corrupt[-1] ^= 0xFF
+    # A damaged LEN claims the following frame as its payload
+    long_len = bytes((BinaryProtocol.SYNC, 20, BinaryProtocol.OP_SET_SERVOS))
+    decoder = FrameDecoder()
+    stream = b"0:GET_POTS\n" + bytes(corrupt) + long_len + good
+    out = decoder.feed(stream) + decoder.feed(b"\x00" * 24)
+    assert out == [(BinaryProtocol.OP_SET_SERVOS, bytes((1, 1, 2, 120)))]
+    assert decoder.crc_errors >= 1
+
+
+def test_oversized_length_is_skipped():
+    good = BinaryProtocol.encode_port_command(BinaryProtocol.OP_SCAN_I2C, None)
+    decoder = FrameDecoder()
+    bad = bytes((BinaryProtocol.SYNC, BinaryProtocol.MAX_PAYLOAD + 1, BinaryProtocol.OP_SET_MOTORS))
+    assert decoder.feed(bad + good) == [(BinaryProtocol.OP_SCAN_I2C, bytes((0xFF,)))]
+    assert decoder.crc_errors == 0
@@ -0,0 +1,72 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from solver import CollisionEngine, KinematicSolver, compute_allowed_collisions
+
+
+def brute_force(engine, model):
+    """Every link pair outside the allowed-collision matrix with any overlapping sphere pair."""
+    allowed = model.allowed_collisions
+    hits = set()
+    for a, b in itertools.combinations(range(len(engine.sphere_radii)), 2):
+        la, lb = (engine.link_names[engine.sphere_link[k]] for k in (a, b))
+        if la == lb or (la, lb) in allowed or (lb, la) in allowed: continue
+        gap = np.linalg.norm(engine.sphere_world[a] - engine.sphere_world[b])
+        if gap < engine.sphere_radii[a] + engine.sphere_radii[b]:
+            hits.add(frozenset((la, lb)))
+    return hits
+
+
+@pytest.mark.parametrize("seed", [None] + list(range(8)))
+def test_check_collisions_matches_brute_force(model, random_state, seed):
+    solver = KinematicSolver(model)
+    engine = CollisionEngine(model)
+    solver.update_state_from_sensors({} if seed is None else random_state(seed))
+    engine.update_collider_positions(solver)
+
+    found = engine.check_collisions()
+    assert len(found) == len(set(map(frozenset, found)))
+    assert set(map(frozenset, found)) == brute_force(engine, model)
+
+
+def test_broad_phase_keeps_every_colliding_pair(model, random_state):
+    solver = KinematicSolver(model)
+    engine = CollisionEngine(model)
+    solver.update_state_from_sensors(random_state(0))
+    engine.update_collider_positions(solver)
+
+    candidates = set(map(frozenset, engine._broad_phase()))
+    assert brute_force(engine, model) <= candidates
+
+
+def test_allowed_collisions_cover_parent_child_pairs(model):
+    allowed = model.allowed_collisions
+    for name, link in model.links.items():
+        if link.parent_name:
+            assert allowed.get((name, link.parent_name), allowed.get((link.parent_name, name))) in ("adjacent", "rigid")
+
+
+def test_neutral_pose_is_collision_free(model):
+    solver = KinematicSolver(model)
+    solver.update_fk()
+    solver.collision_engine.update_collider_positions(solver)
+    assert solver.collision_engine.check_collisions() == []
+
+
+def test_allowed_collisions_are_deterministic(model):
+    # The cached matrix must match a fresh build with the same seed
+    assert compute_allowed_collisions(model) == model.allowed_collisions
+
+
+def test_sphere_positions_accepts_pose_batches(model, random_state):
+    solver = KinematicSolver(model)
+    engine = solver.collision_engine
+    states = [random_state(seed) for seed in range(3)]
+    world = np.stack([solver.tree.forward(solver.tree.angles_from_state(s)) for s in states])
+
+    batch = engine.sphere_positions(world, solver.tree)
+    assert batch.shape == (3,) + engine.sphere_local.shape
+    for k in range(3):
+        np.testing.assert_allclose(batch[k], engine.sphere_positions(world[k], solver.tree), atol=1e-9)
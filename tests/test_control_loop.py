@@ -0,0 +1,181 @@
+import threading
+
+import numpy as np
+import pytest
+
+from communication.protocol_translator import ProtocolTranslator
+from communication.telemetry_parser import TelemetryParser
+from core.control_loop import BangBangController, JointTables
+
+
+class _Signal:
+    def connect(self, slot): pass
+
+
+class FakeConfig:
+    def __init__(self, hardware_map, prefs=None):
+        self.hardware_map = hardware_map
+        self.prefs = {"control_rate_hz": 100, "motor_max_speed": 80, "motor_tolerance": 15, **(prefs or {})}
+        self.preference_changed = _Signal()
+        self.hardware_map_changed = _Signal()
+
+    def get(self, key):
+        return self.prefs.get(key)
+
+
+class FakeSerial:
+    def __init__(self):
+        self.telemetry_parser = TelemetryParser()
+        self.protocol_translator = ProtocolTranslator()
+        self.protocol_translator.ascii_batches = True  # negotiated ASCII v2.4
+        self.sent = []
+
+    def send_raw(self, cmd):
+        self.sent.append(cmd)
+
+
+def n20(name, port, channel, **extra):
+    return {"name": name, "mux_port": port, "motor_type": "n20", "ads_channel": channel,
+            "min_ana": 0, "max_ana": 1800, "angle_min": 0, "angle_max": 180, **extra}
+
+
+HARDWARE = {
+    "1": n20("MOTOR1A", 0, 0),
+    "2": n20("MOTOR2A", 0, 1),
+    "3": n20("MOTOR1A", 1, 0, control_hz=25),
+    "4": {"name": "SERVO1", "mux_port": 2, "pca_pin": 6},
+    "5": n20("MOTOR1B", "D", 2, angle_min=90, angle_max=90),
+    "6": n20("MOTOR2B", 3, 7),
+}
+
+
+def compile_tables(hardware=HARDWARE, previous=None):
+    return JointTables(hardware, TelemetryParser.port_slot, TelemetryParser.RING_CHANNELS, 100, previous)
+
+
+def test_joint_tables_compile():
+    t = compile_tables()
+    assert t.ids == ["1", "2", "3", "4", "5", "6"]
+    assert t.n20.tolist() == [True, True, True, False, False, True]
+    assert t.mux_port.tolist() == [0, 0, 1, 2, TelemetryParser.DIRECT_SLOT, 3]
+    assert t.ads_channel.tolist() == [0, 1, 0, JointTables.NO_CHANNEL, 2, JointTables.NO_CHANNEL]
+    assert t.controlled.tolist() == [True, True, True, False, False, False]
+    assert t.gain[0] == pytest.approx(10.0)
+    assert t.divider.tolist() == [1, 1, 4, 1, 1, 1]
+    assert t.multirate
+    assert (t.last_state == JointTables.UNKNOWN).all()
+
+
+def test_joint_tables_carry_state_by_id():
+    old = compile_tables()
+    old.target[old.index["2"]] = 45.0
+    old.pots[old.index["2"]] = 300
+    old.last_state[old.index["2"]] = 1
+    new = compile_tables({"2": HARDWARE["2"], "7": n20("MOTOR1A", 4, 0)}, previous=old)
+    assert new.target.tolist()[0] == 45.0 and np.isnan(new.target[1])
+    assert new.pots[0] == 300
+    assert new.last_state.tolist() == [1, JointTables.UNKNOWN]
+
+
+@pytest.fixture
+def controller():
+    serial = FakeSerial()
+    ctl = BangBangController(serial, FakeConfig(HARDWARE))
+    ctl.active = True  # Ticks are driven by hand, no loop thread
+    return ctl, serial
+
+
+def push(serial, port, *values):
+    serial.telemetry_parser.history.push(0, TelemetryParser.port_slot(port), *values)
+
+
+def test_tick_sends_only_state_changes(controller):
+    ctl, serial = controller
+    t = ctl.tables
+    t.target[t.index["1"]] = 90.0   # pot target 900
+    t.target[t.index["2"]] = 90.0
+    push(serial, 0, 500, 890, 0, 0)  # joint 1 far below, joint 2 inside tolerance
+
+    ctl._control_tick(0)
+    assert serial.sent == ["0:TEST_MOTOR1A_FWD:80;TEST_MOTOR2A_FWD:0"]
+
+    ctl._control_tick(1)
+    assert len(serial.sent) == 1  # Nothing changed, nothing sent
+
+    push(serial, 0, 1000, 890, 0, 0)  # joint 1 overshoots
+    ctl._control_tick(2)
+    assert serial.sent[-1] == "0:TEST_MOTOR1A_REV:80"
+
+
+def test_tick_uses_newest_frame_per_port(controller):
+    ctl, serial = controller
+    t = ctl.tables
+    t.target[t.index["1"]] = 90.0
+    push(serial, 0, 500, 0, 0, 0)
+    push(serial, 1, 100, 0, 0, 0)
+    push(serial, 0, 905, 0, 0, 0)
+    ctl._control_tick(0)
+    assert t.pots[t.index["1"]] == 905 and t.pots[t.index["3"]] == 100
+    assert serial.sent == ["0:TEST_MOTOR1A_FWD:0"]
+
+
+def test_multirate_joint_runs_on_its_phase(controller):
+    ctl, serial = controller
+    t = ctl.tables
+    i = t.index["3"]
+    t.target[i] = 90.0
+    push(serial, 1, 0, 0, 0, 0)
+    ticks = []
+    for tick in range(8):
+        ctl._control_tick(tick)
+        if serial.sent:
+            ticks.append(tick)
+            serial.sent.clear()
+            t.last_state[i] = JointTables.UNKNOWN  # Force a resend next time it runs
+    assert ticks == [tick for tick in range(8) if (tick + t.phase[i]) % 4 == 0]
+
+
+def test_joints_without_target_or_reading_stay_idle(controller):
+    ctl, serial = controller
+    push(serial, 0, 0, 0, 0, 0)
+    ctl._control_tick(0)  # No targets
+    t = ctl.tables
+    i = t.index["3"]
+    t.target[i] = 90.0
+    ctl._control_tick(int(t.divider[i] - t.phase[i]))  # Its turn and a target, but no frame for port 1 yet
+    assert serial.sent == []
+
+
+@pytest.fixture
+def busy_thread(controller):
+    """A control thread that is still alive until the test ends."""
+    ctl, _ = controller
+    release = threading.Event()
+    ctl._thread = threading.Thread(target=release.wait, daemon=True)
+    ctl._thread.start()
+    yield ctl._thread
+    release.set()
+    ctl._thread.join()
+
+
+def test_tables_swap_on_control_thread_between_ticks(controller, busy_thread):
+    ctl, serial = controller
+    old = ctl.tables
+    old.last_state[old.index["1"]] = 1
+    ctl.targets["1"] = 45.0
+    ctl._compile_tables()
+    assert ctl.tables is old  # The running loop owns the live tables
+
+    ctl._swap_tables()  # What _run does before each tick
+    t = ctl.tables
+    assert t is not old
+    assert t.last_state[t.index["1"]] == 1
+    assert t.target[t.index["1"]] == 45.0
+
+
+def test_start_does_not_wait_forever_on_old_thread(controller, busy_thread):
+    ctl, serial = controller
+    ctl.active = False
+    ctl.start()
+    assert not ctl.active
+    assert ctl._thread is busy_thread
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from core.geometry import HAS_GL, GeometryGenerator
+from core.robot_loader import VisualData
+
+LOFT = {
+    "method": "loft", "length_mm": 120.0, "color": "Bone",
+    "sections": [
+        {"percent": 0.0, "shape": "circle", "radius": 30},
+        {"percent": 0.5, "shape": "oval", "radius_x": 25, "radius_y": 15},
+        {"percent": 1.0, "shape": "box", "width": 20, "depth": 10},
+    ],
+}
+
+
+def reference_faces(num_rings, segments):
+    """The original per-quad face loop."""
+    faces = []
+    for r in range(num_rings - 1):
+        base, nxt = r * segments, (r + 1) * segments
+        for i in range(segments):
+            i_n = (i + 1) % segments
+            faces.append([base + i, base + i_n, nxt + i])
+            faces.append([base + i_n, nxt + i_n, nxt + i])
+    return np.array(faces)
+
+
+def test_stitched_faces_match_reference_loop():
+    verts, faces = GeometryGenerator.generate_loft(VisualData(LOFT), 16)
+    assert verts.shape == (3 * 16, 3)
+    np.testing.assert_array_equal(faces, reference_faces(3, 16))
+
+
+def test_loft_rings_follow_sections():
+    verts, _ = GeometryGenerator.generate_loft(VisualData(dict(LOFT, flip=True)), 8)
+    rings = verts.reshape(3, 8, 3)
+    np.testing.assert_allclose(rings[:, :, 2], [[0.0] * 8, [-60.0] * 8, [-120.0] * 8])
+    np.testing.assert_allclose(np.linalg.norm(rings[0, :, :2], axis=1), 30.0)
+    np.testing.assert_allclose(rings[1, 0, :2], [25.0, 0.0], atol=1e-9)
+    np.testing.assert_allclose(rings[1, 2, :2], [0.0, 15.0], atol=1e-9)
+
+
+def test_mesh_key_ignores_colour():
+    a = GeometryGenerator.mesh_key(VisualData(LOFT))
+    assert a == GeometryGenerator.mesh_key(VisualData(dict(LOFT, color="Red")))
+    assert a != GeometryGenerator.mesh_key(VisualData(dict(LOFT, length_mm=121.0)))
+    assert a != GeometryGenerator.mesh_key(VisualData(LOFT), segments=16)
+
+
+@pytest.mark.skipif(not HAS_GL, reason="pyqtgraph.opengl not available")
+def test_mesh_data_is_shared_for_equal_geometry():
+    md = GeometryGenerator.mesh_data(VisualData(LOFT))
+    assert GeometryGenerator.mesh_data(VisualData(dict(LOFT, color="Red"))) is md
+    assert GeometryGenerator.mesh_data(VisualData(dict(LOFT, length_mm=121.0))) is not md
+    assert GeometryGenerator.mesh_data(VisualData({"method": "none"})) is None
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    """A fresh in-memory and on-disk mesh cache at tmp_path/robot.mesh.npz."""
+    G = GeometryGenerator
+    monkeypatch.setattr(G, "_mesh_cache", OrderedDict())
+    # Restored afterwards; load_disk_cache rebinds them
+    for name in ("_disk_path", "_disk_arrays", "_disk_used", "_disk_dirty"):
+        monkeypatch.setattr(G, name, getattr(G, name))
+    path = str(tmp_path / "robot.mesh.npz")
+    G.load_disk_cache(path)
+    return path
+
+
+@pytest.mark.skipif(not HAS_GL, reason="pyqtgraph.opengl not available")
+def test_disk_cache_round_trip(disk_cache, monkeypatch):
+    G = GeometryGenerator
+    verts, faces = G.mesh_arrays(VisualData(LOFT))
+    G.mesh_data(VisualData(LOFT))
+    G.save_disk_cache()
+
+    G._mesh_cache.clear()
+    assert G.load_disk_cache(disk_cache) == 1
+
+    def fail(*args, **kwargs): raise AssertionError("mesh regenerated")
+    monkeypatch.setattr(G, "mesh_arrays", fail)
+    md = G.mesh_data(VisualData(LOFT))
+    np.testing.assert_allclose(md.vertexes(), verts)
+    np.testing.assert_array_equal(md.faces(), faces)
+
+
+@pytest.mark.skipif(not HAS_GL, reason="pyqtgraph.opengl not available")
+def test_disk_cache_prunes_unused_entries(disk_cache):
+    G = GeometryGenerator
+    G.mesh_data(VisualData(LOFT))
+    G.save_disk_cache()
+
+    assert G.load_disk_cache(disk_cache) == 1
+    G.save_disk_cache()
+    assert G.load_disk_cache(disk_cache) == 0
+
+
+def test_disk_cache_ignores_other_versions(disk_cache):
+    np.savez(disk_cache, version=np.array(GeometryGenerator.DISK_CACHE_VERSION + 1),
+             abc_v=np.zeros((3, 3)), abc_f=np.zeros((1, 3), dtype=int))
+    assert GeometryGenerator.load_disk_cache(disk_cache) == 0
+
+
+def test_lod_segments_coarsen_with_distance_and_role():
+    lod = GeometryGenerator.lod_segments
+    assert [lod(d) for d in (500.0, 2000.0, 5000.0)] == [32, 16, 8]
+    assert [lod(d, "ghost") for d in (500.0, 2000.0, 5000.0)] == [16, 8, 8]
+    assert lod(500.0, "collider") == 16
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from PyQt6.QtGui import QMatrix4x4
+
+from solver import KinematicSolver, KinematicTree
+
+
+def reference_fk(model, state):
+    """The original recursive QMatrix4x4 traversal: {link name: (4, 4) world transform}."""
+    out = {}
+
+    def visit(link, parent):
+        m = QMatrix4x4(parent)
+        if link.joint:
+            m.translate(*link.joint.origin)
+            angle = state.get(str(link.joint.id), 90.0) if link.joint.id else 90.0
+            m.rotate(angle - 90.0, *link.joint.axis)
+        out[link.name] = np.array(m.data(), dtype=float).reshape(4, 4).T
+        for child in link.children:
+            visit(child, m)
+
+    visit(model.root, QMatrix4x4())
+    return out
+
+
+@pytest.mark.parametrize("seed", [None, 1, 2])
+def test_fk_matches_reference_traversal(model, random_state, seed):
+    state = {} if seed is None else random_state(seed)
+    tree = KinematicTree(model)
+    world = tree.forward(tree.angles_from_state(state))
+    reference = reference_fk(model, state)
+
+    assert len(tree) == len(model.links)
+    for name, expected in reference.items():
+        np.testing.assert_allclose(world[tree.index[name]], expected, atol=1e-2)
+
+
+def test_parents_precede_children(model):
+    tree = KinematicTree(model)
+    i = np.arange(len(tree))
+    has_parent = tree.parents >= 0
+    assert (tree.parents[has_parent] < i[has_parent]).all()
+    assert (tree.depths[has_parent] == tree.depths[tree.parents[has_parent]] + 1).all()
+
+
+def test_batched_fk_matches_single_poses(model, random_state):
+    tree = KinematicTree(model)
+    states = [random_state(seed) for seed in range(5)]
+    q = np.array([[s[j] for j in tree.joint_names] for s in states])
+    batch = tree.forward(tree.angles_from_joints(q))
+
+    assert batch.shape == (5, len(tree), 4, 4)
+    for k, state in enumerate(states):
+        np.testing.assert_allclose(batch[k], tree.forward(tree.angles_from_state(state)), atol=1e-9)
+
+
+def test_angles_from_joints_leaves_unlisted_joints_neutral(model):
+    tree = KinematicTree(model)
+    jid = tree.joint_names[0]
+    angles = tree.angles_from_joints([[30.0]], joint_ids=[jid])
+    np.testing.assert_array_equal(angles[0], tree.angles_from_state({jid: 30.0}))
+    with pytest.raises(ValueError):
+        tree.angles_from_joints(np.zeros((2, 3)), joint_ids=[jid])
+
+
+def reachable_target(ik, state, link):
+    chain = ik._ik_chain(ik.tree.index[link])
+    ids = {ik.tree.joint_ids[i] for i in chain}
+    state = {j: v for j, v in state.items() if j in ids}
+    world = ik.tree.forward(ik.tree.angles_from_state(state))
+    return list(world[ik.tree.index[link], :3, 3])
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("link", ["r_hand_palm", "l_wrist"])
+def test_dls_converges_to_reachable_target(model, random_state, link, seed):
+    ik = KinematicSolver(model)
+    target = reachable_target(ik, random_state(seed), link)
+    result = ik.solve_ik(target, link, iterations=100, tolerance=1.0, solver="dls")
+
+    assert result["solver"] == "dls"
+    assert result["converged"]
+    assert result["residual"] <= 1.0
+    assert result["residuals"][-1] < result["residuals"][0]
+
+
+def test_ccd_reduces_residual(model, random_state):
+    ik = KinematicSolver(model)
+    target = reachable_target(ik, random_state(0), "r_wrist")
+    result = ik.solve_ik(target, "r_wrist", iterations=60, solver="ccd")
+
+    assert result["solver"] == "ccd"
+    assert result["residual"] < result["residuals"][0] / 10
+
+
+def test_refresh_recomputes_only_dirty_links(model, random_state):
+    tree = KinematicTree(model)
+    base, moved = random_state(1), random_state(2)
+    world = tree.forward(tree.angles_from_state(base))
+    tree.mark_clean()
+
+    angles = tree.angles_from_state(base)
+    jid = tree.actuated[0][1]
+    for j, other in tree.actuated:
+        if other == jid:
+            angles[j] = moved[jid]
+            tree.links[j].mark_dirty()
+    subtree = sum(1 for link in tree.links if link.fk_dirty)
+
+    assert tree.refresh(world, angles) == subtree
+    np.testing.assert_allclose(world, tree.forward(angles), atol=1e-9)
+    assert tree.refresh(world, angles) == 0
+
+
+def test_refresh_scope_limits_work_to_the_path(model, random_state):
+    tree = KinematicTree(model)
+    angles = tree.angles_from_state(random_state(3))
+    world = tree.forward(angles)
+    tree.mark_clean()
+
+    end = tree.index["r_hand_palm"]
+    scope = tree.path_to(end)
+    assert scope[0] == 0 and scope[-1] == end
+    for link in tree.links: link.fk_dirty = True
+    tree.refresh(world, angles, scope)
+    np.testing.assert_allclose(world[end], tree.forward(angles)[end], atol=1e-9)
@@ -0,0 +1,43 @@
+from solver import KinematicSolver, SafetyGate
+
+
+def test_gate_blocks_colliding_pose(model, colliding_state):
+    solver = KinematicSolver(model)
+    gate = SafetyGate(solver)
+
+    result = gate.check(colliding_state)
+    assert not result["ok"]
+    assert result["reason"] == "collision"
+    assert result["links"] is not None
+    assert gate.stats()["blocked"] == 1
+    assert solver.current_state == {}
+
+
+def test_gate_allows_free_move(model):
+    solver = KinematicSolver(model)
+    gate = SafetyGate(solver)
+    assert gate.check({solver.joint_order[0]: 95.0})["ok"]
+
+
+def test_gate_lets_colliding_robot_move_apart(model, colliding_state):
+    solver = KinematicSolver(model)
+    solver.update_state_from_sensors(colliding_state)
+    assert solver.collision_engine.check_collisions()
+    gate = SafetyGate(solver)
+    neutral = {jid: 90.0 for jid in solver.joint_order}
+    assert gate.check(neutral)["ok"]
+
+
+def test_gate_fails_closed_over_budget(model):
+    solver = KinematicSolver(model)
+    gate = SafetyGate(solver, budget_ms=0.0)
+    result = gate.check({solver.joint_order[0]: 95.0})
+    assert not result["ok"]
+    assert result["reason"] == "budget"
+
+
+def test_disabled_gate_allows_everything(model, colliding_state):
+    gate = SafetyGate(KinematicSolver(model))
+    gate.enabled = False
+    assert gate.check(colliding_state)["ok"]
+    assert gate.stats()["checks"] == 0
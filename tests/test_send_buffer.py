@@ -0,0 +1,82 @@
+from communication.binary_protocol import BinaryProtocol
+from communication.protocol_translator import ProtocolTranslator
+from communication.send_buffer import SendBuffer
+
+
+def make_buffer(max_size=256):
+    translator = ProtocolTranslator()
+    buf = SendBuffer(max_size, trim=translator.drop_channels)
+
+    def put(cmd):
+        channels, diagnostic = translator.command_channels(cmd)
+        return buf.put(cmd, channels, SendBuffer.DIAGNOSTIC if diagnostic else SendBuffer.CONTROL)
+    return buf, put, translator
+
+
+def drain(buf):
+    out = []
+    while (cmd := buf.pop()) is not None: out.append(cmd)
+    return out
+
+
+def test_single_after_batch_goes_out_last():
+    buf, put, _ = make_buffer()
+    put("0:SET_SERVO1:10;SET_SERVO2:20\n")
+    put("0:SET_SERVO1:30\n")
+    assert drain(buf) == ["0:SET_SERVO2:20\n", "0:SET_SERVO1:30\n"]
+
+
+def test_batch_supersedes_older_single():
+    buf, put, _ = make_buffer()
+    put("0:SET_SERVO1:10\n")
+    put("1:SET_SERVO1:40\n")
+    put("0:SET_SERVO1:30;SET_SERVO2:20\n")
+    assert drain(buf) == ["1:SET_SERVO1:40\n", "0:SET_SERVO1:30;SET_SERVO2:20\n"]
+    assert buf.stats()["coalesced"] == 1
+
+
+def test_replaced_value_moves_to_back():
+    buf, put, _ = make_buffer()
+    put("0:SET_SERVO1:10\n")
+    put("0:SET_SERVO2:20\n")
+    put("0:SET_SERVO1:30\n")
+    assert drain(buf) == ["0:SET_SERVO2:20\n", "0:SET_SERVO1:30\n"]
+
+
+def test_motor_direction_change_is_same_channel():
+    buf, put, _ = make_buffer()
+    put("0:TEST_MOTOR1A_FWD:50;TEST_MOTOR1B_FWD:50\n")
+    put("0:TEST_MOTOR1A_REV:0\n")
+    assert drain(buf) == ["0:TEST_MOTOR1B_FWD:50\n", "0:TEST_MOTOR1A_REV:0\n"]
+
+
+def test_stream_on_off_keeps_latest():
+    buf, put, translator = make_buffer()
+    put(translator.translate_stream(True, [0, 1]) + "\n")
+    put(translator.translate_stream(False) + "\n")
+    put(translator.translate_stream(True, [0]) + "\n")
+    assert drain(buf) == ["STREAM:ON:1:50\n"]
+
+
+def test_binary_batch_is_trimmed():
+    buf, put, _ = make_buffer()
+    put(BinaryProtocol.encode_servos(2, [("SERVO1", 10), ("SERVO3", 30)]))
+    put(BinaryProtocol.encode_servos(2, [("SERVO1", 90)]))
+    assert drain(buf) == [BinaryProtocol.encode_servos(2, [("SERVO3", 30)]),
+                          BinaryProtocol.encode_servos(2, [("SERVO1", 90)])]
+
+
+def test_control_before_diagnostics():
+    buf, put, _ = make_buffer()
+    put("0:TEST_POTS\n")
+    put("0:SET_SERVO1:10\n")
+    assert drain(buf) == ["0:SET_SERVO1:10\n", "0:TEST_POTS\n"]
+
+
+def test_full_buffer_keeps_older_values_when_new_command_is_dropped():
+    buf, put, _ = make_buffer(max_size=2)
+    put("0:SET_SERVO1:10;SET_SERVO2:20\n")
+    put("1:SET_SERVO1:40\n")
+    assert not put("0:SET_SERVO1:30;SET_SERVO3:5\n")
+    assert put("1:SET_SERVO1:50\n")
+    assert drain(buf) == ["0:SET_SERVO1:10;SET_SERVO2:20\n", "1:SET_SERVO1:50\n"]
@@ -0,0 +1,100 @@
+from communication.command_batcher import CommandBatch
+from communication.serial_manager import SerialManager
+
+MS = 1_000_000
+
+
+def manager_with_polls(*polls):
+    sm = SerialManager()
+    sm._pot_polls.extend(polls)
+    return sm
+
+
+def test_named_reply_retires_its_own_poll():
+    sm = manager_with_polls((0, 0), (1, 0), (2, 0))
+    assert sm._match_pot_poll("1", 10 * MS) == "1"
+    assert [p for p, _ in sm._pot_polls] == [0, 2]
+
+
+def test_unnamed_reply_takes_oldest_poll():
+    sm = manager_with_polls((3, 0), (1, 0))
+    assert sm._match_pot_poll(None, 10 * MS) == 3
+    assert sm._match_pot_poll(None, 10 * MS) == 1
+    assert sm._match_pot_poll(None, 10 * MS) is None
+
+
+def test_lost_polls_expire():
+    sm = manager_with_polls((0, 0), (1, 400 * MS))
+    # The poll for port 0 never got an answer; it must not claim this reply
+    assert sm._match_pot_poll(None, 600 * MS) == 1
+    assert not sm._pot_polls
+
+
+def batched_commands(sm):
+    sm.connected = True
+    batch = CommandBatch()
+    batch.add({'mux_port': 2, 'name': 'SERVO1'}, "servo", 10)
+    batch.add({'mux_port': 2, 'name': 'SERVO3'}, "servo", 30)
+    batch.send(sm)
+    out = []
+    while (cmd := sm._send_buf.pop()) is not None: out.append(cmd)
+    return out
+
+
+def test_no_batches_before_negotiation():
+    assert batched_commands(SerialManager()) == ["2:SET_SERVO1:10\n", "2:SET_SERVO3:30\n"]
+
+
+def test_old_ascii_gets_one_command_per_channel():
+    sm = SerialManager()
+    sm._on_protocol("ASCII2.3")
+    assert not sm.protocol_translator.ascii_batches
+    assert batched_commands(sm) == ["2:SET_SERVO1:10\n", "2:SET_SERVO3:30\n"]
+
+
+def test_ascii_batches_after_negotiation():
+    sm = SerialManager()
+    sm.prefer_binary = False
+    sm._on_protocol("ASCII2.4,BIN1")
+    assert not sm.protocol_translator.binary
+    assert batched_commands(sm) == ["2:SET_SERVO1:10;SET_SERVO3:30\n"]
+
+
+class FakePort:
+    """Serial port that returns the given chunks, then stops the reader."""
+    is_open = True
+    in_waiting = 0
+
+    def __init__(self, sm, chunks):
+        self.sm, self.chunks = sm, list(chunks)
+
+    def read(self, n):
+        if self.chunks: return self.chunks.pop(0)
+        self.sm._stop_event.set()
+        return b""
+
+
+def test_no_stream_without_negotiated_support():
+    sm = SerialManager()
+    sm.connected = True
+    sm._on_protocol("ASCII2.4,BIN1")
+    assert not sm.enable_stream(True, [0, 1])
+    assert sm._send_buf.pop() is None
+    assert not sm._stream_resets
+
+
+def test_stream_reset_runs_on_reader_thread():
+    sm = SerialManager()
+    sm.connected = True
+    sm.prefer_binary = False
+    sm._on_protocol("ASCII2.4,BIN1,STREAM1")
+    assert sm.enable_stream(True, [0, 1])
+    assert sm._send_buf.pop() == "STREAM:ON:3:50\n"
+    parser = sm.telemetry_parser
+    assert not parser.stream_ports  # left to the reader
+
+    sm.ser = FakePort(sm, [b"SPOTS:7:0:1,2,3,4\nSPOTS:7:1:5,6,7,8\n"])
+    sm._reader_loop()
+    assert parser.stream_ports == {0, 1}
+    assert parser.frame_count == 1
+    assert parser.snapshot(0)[1].tolist() == [5, 6, 7, 8]
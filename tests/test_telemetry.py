@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+from communication.telemetry_parser import TelemetryParser
+from communication.telemetry_ring import TelemetryRing
+
+
+def push_range(ring, start, stop):
+    for k in range(start, stop):
+        ring.push(k, k % 8, k, k + 1, k + 2, k + 3)
+
+
+def test_ring_read_stops_at_wrap_point():
+    ring = TelemetryRing(size=8)
+    push_range(ring, 0, 6)
+    cursor = ring.cursor(from_oldest=True)
+    assert cursor.read()[0].tolist() == [0, 1, 2, 3, 4, 5]
+
+    push_range(ring, 6, 11)  # slots 6, 7, then wraps to 0..2
+    t_ns, port, values = cursor.read()
+    assert t_ns.tolist() == [6, 7]
+    assert values[1].tolist() == [7, 8, 9, 10]
+    assert cursor.read()[0].tolist() == [8, 9, 10]
+    assert len(cursor.read()[0]) == 0
+    assert cursor.overruns == 0
+
+
+def test_ring_cursor_counts_overruns():
+    ring = TelemetryRing(size=8)
+    cursor = ring.cursor()
+    push_range(ring, 0, 13)
+    assert cursor.pending() == 13
+    assert cursor.read()[0].tolist() == [5, 6, 7]
+    assert cursor.overruns == 5
+    assert cursor.read()[0].tolist() == [8, 9, 10, 11, 12]
+
+
+def test_ring_cursor_max_items():
+    ring = TelemetryRing(size=8)
+    cursor = ring.cursor()
+    push_range(ring, 0, 5)
+    assert cursor.read(max_items=2)[0].tolist() == [0, 1]
+    assert cursor.pending() == 3
+
+
+def test_ring_cursors_are_independent():
+    ring = TelemetryRing(size=8)
+    a = ring.cursor()
+    push_range(ring, 0, 3)
+    b = ring.cursor(from_oldest=True)
+    assert a.read()[0].tolist() == [0, 1, 2]
+    assert b.read()[0].tolist() == [0, 1, 2]
+    late = ring.cursor()
+    assert late.pending() == 0
+
+
+def feed(parser, line, t_ns=0):
+    buf = bytearray(line.encode() + b"\n")
+    return parser.parse_stream_frame(buf, 6, len(buf) - 1, t_ns)
+
+
+def test_stream_frames_assemble_into_snapshots():
+    parser = TelemetryParser()
+    parser.start_stream([0, "D"])
+    cursor = parser.history.cursor()
+
+    assert feed(parser, "SPOTS:7:0:1,2,3,4") == -1
+    frame = feed(parser, "SPOTS:7:D:-5,6,7,8")
+    assert frame == 0
+    snap = parser.snapshot(frame)
+    assert snap[0].tolist() == [1, 2, 3, 4]
+    assert snap[TelemetryParser.DIRECT_SLOT].tolist() == [-5, 6, 7, 8]
+    assert cursor.read()[1].tolist() == [0, TelemetryParser.DIRECT_SLOT]
+
+
+def test_stream_counts_incomplete_sweeps_and_gaps():
+    parser = TelemetryParser()
+    parser.start_stream([0, 1])
+    feed(parser, "SPOTS:1:0:1,1,1,1")
+    feed(parser, "SPOTS:3:0:2,2,2,2")  # seq 1 never completed, seq 2 missing
+    assert feed(parser, "SPOTS:3:1:3,3,3,3") == 0
+    stats = parser.stream_stats
+    assert stats["incomplete"] == 1 and stats["seq_gaps"] == 1 and stats["snapshots"] == 1
+
+
+def test_stream_rejects_malformed_frames():
+    parser = TelemetryParser()
+    parser.start_stream([0])
+    assert feed(parser, "SPOTS:1:0:1,2,3") == -1
+    assert feed(parser, "SPOTS:x:0:1,2,3,4") == -1
+    assert parser.stream_stats["errors"] == 2
+    assert parser.frame_count == 0
+    assert parser.history.head == 0
+
+
+def test_stream_frame_from_text_line():
+    parser = TelemetryParser()
+    parser.start_stream([2])
+    before = time.monotonic_ns()
+    assert parser.parse_line("SPOTS:0:2:9,8,7,6") == {"frame": 0}
+    assert parser.snapshot(0)[2].tolist() == [9, 8, 7, 6]
+    # Stamped on arrival, so history cursors order it with polled replies
+    assert before <= parser.history.t_ns[0] <= time.monotonic_ns()
+    parser.parse_line("SPOTS:1:2:1,2,3,4", t_ns=42)
+    assert parser.history.t_ns[1] == 42
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("POTS:3:1,-2,3,4", {"pots": [1, -2, 3, 4], "pots_port": "3"}),
+    ("POTS:D:5,6,7,8", {"pots": [5, 6, 7, 8], "pots_port": "D"}),
+    ("POTS:1,2,3,4", {"pots": [1, 2, 3, 4]}),
+])
+def test_parse_pots(line, expected):
+    assert TelemetryParser().parse_line(line) == expected
+
+
+def test_record_pots_skips_unknown_port():
+    parser = TelemetryParser()
+    parser.record_pots(10, None, [1, 2, 3, 4])
+    assert parser.history.head == 0
+    parser.record_pots(11, "D", [1, 2])
+    assert parser.history.t_ns[0] == 11
+    assert parser.history.port[0] == TelemetryParser.DIRECT_SLOT
+    assert parser.history.values[0].tolist() == [1, 2, 0, 0]
@@ -0,0 +1,66 @@
+import numpy as np
+
+from solver import KinematicSolver, TrajectoryValidator, complete_frames
+
+
+def test_free_path_passes(model):
+    solver = KinematicSolver(model)
+    ids = solver.joint_order
+    frames = [{}, {ids[0]: 100.0}, {ids[0]: 80.0}]
+    result = TrajectoryValidator(solver).validate(frames)
+    assert result["ok"]
+    assert result["samples"] > len(frames)
+
+
+def test_path_into_collision_reports_contact(model, colliding_state):
+    solver = KinematicSolver(model)
+    result = TrajectoryValidator(solver).validate([{}, {}, colliding_state])
+
+    assert not result["ok"]
+    assert result["segment"] == 1
+    assert 0.0 < result["t"] <= 1.0
+    solver.update_state_from_sensors(result["pose"])
+    hits = set(map(frozenset, solver.collision_engine.check_collisions()))
+    assert frozenset(result["links"]) in hits
+
+
+def test_first_collision_matches_single_pose_checks(model, random_state):
+    solver = KinematicSolver(model)
+    engine = solver.collision_engine
+    tree = solver.tree
+    states = [{}] * 3 + [random_state(seed) for seed in range(3)]
+    world = np.stack([tree.forward(tree.angles_from_state(s)) for s in states])
+
+    index, links = engine.first_collision(engine.sphere_positions(world, tree))
+    assert index == 3
+    solver.update_state_from_sensors(states[3])
+    assert frozenset(links) in set(map(frozenset, engine.check_collisions()))
+
+
+def test_complete_frames_carries_omitted_joints_forward():
+    frames = complete_frames([{"1": 10}, {"2": 20}, {"1": 30}], {"2": 45.0}, ["1", "2", "3"])
+    assert frames == [
+        {"1": 10.0, "2": 45.0, "3": 90.0},
+        {"1": 10.0, "2": 20.0, "3": 90.0},
+        {"1": 30.0, "2": 20.0, "3": 90.0},
+    ]
+
+
+def test_loop_checks_wrap_from_last_to_first_frame(model):
+    solver = KinematicSolver(model)
+    j0, j1 = solver.joint_order[:2]
+    col0, col1 = solver.joint_order.index(j0), solver.joint_order.index(j1)
+    validator = TrajectoryValidator(solver)
+
+    # Stand-in obstacle that only the straight path from the last frame back to the first crosses
+    def first_hit(q):
+        hit = np.nonzero((np.abs(q[:, col0] - q[:, col1]) < 5.0) & (np.abs(q[:, col0] - 90.0) < 10.0))[0]
+        return (int(hit[0]), ("a", "b")) if len(hit) else None
+    validator._first_hit = first_hit
+
+    frames = [{j0: 60.0, j1: 60.0}, {j0: 60.0, j1: 120.0}, {j0: 120.0, j1: 120.0}]
+    assert validator.validate(frames)["ok"]
+    result = validator.validate(frames, loop=True)
+    assert not result["ok"]
+    assert result["segment"] == 2
+    assert 0.3 < result["t"] < 0.5  # Contact starts a third of the way along the wrap
@@ -141,7 +141,8 @@ class LayoutManager:
         # Data connections
         self.serial.raw_log_received.connect(self.engineer.on_raw_log)
         self.serial.pots_updated.connect(self.engineer.on_pots_update)
-        self.serial.pots_updated.connect(self.controller.update_sensors)
+        self.serial.snapshot_updated.connect(self.engineer.on_snapshot)
+        # The controller reads pot frames from the telemetry history itself (see _read_sensors)
 
         if self.viewport and self.architect:
             self.architect.link_selected.connect(self.viewport.select_link)
@@ -7,7 +7,9 @@ from core.robot_loader import RobotModel
 from core.kinematics import KinematicsEngine
 from core.config_manager import config_manager
 from core.control_loop import BangBangController
+from core.render_scheduler import RenderScheduler
 from communication.serial_manager import SerialManager
+from solver import SafetyGate
 
 # UI Components
 from ui.layout_manager import LayoutManager
@@ -24,6 +26,9 @@ class MainWindow(QMainWindow):
         config_manager.load_all()
         self.serial = SerialManager()
         self.controller = BangBangController(self.serial, config_manager)
+        self.safety_gate = SafetyGate(budget_ms=config_manager.get("safety_budget_ms") or 5.0)
+        self.safety_gate.enabled = bool(config_manager.get("safety_collision_enabled"))
+        config_manager.preference_changed.connect(self._on_pref_changed)
         
         # 2. Core Components
         self.robot_model = RobotModel()
@@ -37,6 +42,10 @@ class MainWindow(QMainWindow):
         self.ui.setup_ui()
         self.ui.connect_signals()
         
+        # 5. Coalesce FK + repaint to one per display frame
+        self.render_scheduler = RenderScheduler(self.kinematics, self.ui.viewport, config_manager.get("render_fps") or 60)
+        if self.kinematics: self.kinematics.render_scheduler = self.render_scheduler
+        
         # Set Default View
         self.ui.set_view(0)
 
@@ -46,6 +55,7 @@ class MainWindow(QMainWindow):
         
         if self.robot_model.load_from_file(config_path):
             self.kinematics = KinematicsEngine(self.robot_model)
+            self.safety_gate.solver = self.kinematics
         else:
             logger.error("Failed to initialize Robot Model.")
 
@@ -56,6 +66,10 @@ class MainWindow(QMainWindow):
         if self.robot_model.load_from_file(file_path):
             # Recreate Kinematics
             self.kinematics = KinematicsEngine(self.robot_model)
+            self.safety_gate.solver = self.kinematics
+            self.safety_gate.invalidate()
+            self.render_scheduler.kinematics = self.kinematics
+            self.kinematics.render_scheduler = self.render_scheduler
             
             # Recreate Viewport Scene
             if self.ui.viewport:
@@ -83,19 +97,33 @@ class MainWindow(QMainWindow):
     def _on_structure_change(self):
         if self.kinematics and self.ui.viewport:
             self.kinematics.rebuild_scene(self.ui.viewport.view_widget)
+        self.safety_gate.invalidate()
+
+    def _on_pref_changed(self, key, value):
+        if key == "safety_collision_enabled":
+            self.safety_gate.enabled = bool(value)
+        elif key == "safety_budget_ms":
+            self.safety_gate.budget_ms = float(value)
+        elif key == "render_fps":
+            self.render_scheduler.set_target_fps(value)
 
     def _on_joint_move(self, joint_id, value):
         if self.kinematics:
+            # 0. Safety Gate: never show or send a self-colliding pose
+            check = self.safety_gate.check({str(joint_id): float(value)})
+            if not check["ok"]:
+                self.statusBar().showMessage(f"Blocked: {check['reason']} {check['links'] or ''}", 2000)
+                return
+
             # 1. Update Visuals
             self.kinematics.update_state_from_sensors({str(joint_id): float(value)})
-            if self.ui.viewport: self.ui.viewport.update_view()
             
             # 2. Hardware Control
             hw_config = config_manager.get_pin_config(joint_id)
             if hw_config:
                 m_type = hw_config.get('motor_type', 'n20')
                 if m_type == 'sg90':
-                    cmd = self.serial.protocol_translator.translate_servo_command(int(joint_id), float(value), hw_config)
-                    if cmd: self.serial.send_raw(cmd)
+                    # Flushed with the other joints moved this event-loop pass, one command per port
+                    self.serial.batcher.queue_servo(hw_config, float(value))
                 else:
                     self.controller.set_target(joint_id, value)
\ No newline at end of file
@@ -154,6 +154,7 @@ class ArchitectMode(QWidget):
             le_id.setPlaceholderText("ID (e.g. 14)")
             le_id.setStyleSheet("background-color: #333; padding: 4px; border: 1px solid #555;")
             le_id.textChanged.connect(lambda v: setattr(link.joint, 'id', v))
+            le_id.editingFinished.connect(self.model_changed.emit)
             self.form_layout.addRow("Hardware ID:", le_id)
 
             self._add_section_header("ORIGIN (mm)")
@@ -35,13 +35,14 @@ class EngineerMode(QWidget):
         self.scroll.setWidget(self.content_widget)
         main_layout.addWidget(self.scroll)
         
-        # Diagnostics Timer
+        # Diagnostics Timer (live view on firmware without STREAM)
         self.scan_timer = QTimer()
         self.scan_timer.timeout.connect(self._on_scan_tick)
         self.scan_timer.setInterval(100) 
 
         # Signals
         config_manager.hardware_map_changed.connect(self._populate_table)
+        self.serial.protocol_negotiated.connect(self._restart_stream)
         theme_manager.theme_changed.connect(self._update_colors)
 
     def _setup_ui(self, container):
@@ -226,6 +227,7 @@ class EngineerMode(QWidget):
         
         self.mod_combo = QComboBox()
         self.mod_combo.addItems(["Direct (No Mux)"] + [f"Port {i}" for i in range(8)])
+        self.mod_combo.currentIndexChanged.connect(self._restart_stream)
         
         conn_layout.addWidget(QLabel("COM Port:"))
         conn_layout.addWidget(self.port_combo)
@@ -379,7 +381,7 @@ class EngineerMode(QWidget):
             full_cmd = f"{self.get_prefix()}:{cmd}"
             self.serial.send_raw(full_cmd)
             # Pause scan briefly to prioritize manual command
-            if self.live_scan and "TEST_POTS" not in cmd:
+            if self.scan_timer.isActive() and "TEST_POTS" not in cmd:
                 self.scan_timer.stop()
                 QTimer.singleShot(200, self.scan_timer.start)
             
@@ -391,18 +393,42 @@ class EngineerMode(QWidget):
             if not self.serial.connected:
                 self.btn_live.setChecked(False)
                 return
+            self.live_scan = True
             self.btn_live.setText("STOP STREAMING")
             self.btn_live.setStyleSheet(f"background-color: {theme_manager.get_color('danger')}; color: white; font-weight: bold;")
-            self.scan_timer.start()
+            self._start_live()
         else:
+            self.live_scan = False
             self.btn_live.setText("START LIVE DATA STREAM")
             self.btn_live.setStyleSheet("") # Revert to default
             self.scan_timer.stop()
+            self.serial.enable_stream(False)
+
+    def _start_live(self):
+        """Streams the sweep if the firmware supports it, else polls the selected module."""
+        if self.serial.enable_stream(True, self._stream_ports(), config_manager.get("telemetry_stream_hz") or 50):
+            self.scan_timer.stop()
+        else:
+            self.scan_timer.start()
+
+    def _restart_stream(self):
+        # The selected module must be part of the sweep; negotiation may switch polling to streaming
+        if self.live_scan and self.serial.connected:
+            self._start_live()
 
     def _on_scan_tick(self):
-        if self.serial.connected:
+        if self.serial.connected and self.live_scan:
             prefix = self.get_prefix()
             self.serial.send_raw(f"{prefix}:TEST_POTS")
+        else:
+            self.scan_timer.stop()
+
+    def _stream_ports(self):
+        """Every mux port with a mapped pot, plus the module selected for inspection."""
+        ports = {hw.get('mux_port', 0) for hw in config_manager.hardware_map.values() if hw.get('ads_channel') is not None}
+        prefix = self.get_prefix()
+        ports.add(-1 if prefix == "D" else int(prefix))
+        return sorted(ports)
 
     def on_raw_log(self, line):
         if "I2C_SCAN:" in line:
@@ -411,6 +437,27 @@ class EngineerMode(QWidget):
         elif not self.live_scan:
             self.log(line)
 
+    def on_snapshot(self, frame):
+        """Streamed sweep: refreshes the selected module's readout and every mapped row at once."""
+        if not self.live_scan: return
+        parser = self.serial.telemetry_parser
+        pots = parser.snapshot(frame)
+        slot = parser.port_slot(self.get_prefix())
+        if slot in parser.stream_ports:
+            self.lbl_raw_pots.setText("  |  ".join([f"{v}" for v in pots[slot]]))
+
+        if self.tabs.currentIndex() != 0: return
+        color = QBrush(QColor(theme_manager.get_color('success')))
+        for r in range(self.table.rowCount()):
+            w_mux, w_ads = self.table.cellWidget(r, 2), self.table.cellWidget(r, 5)
+            if not (w_mux and w_ads): continue
+            slot = int(w_mux.currentText())
+            ch = w_ads.value()
+            if slot in parser.stream_ports and 0 <= ch < parser.RING_CHANNELS:
+                item = self.table.item(r, 6)
+                item.setText(str(pots[slot, ch]))
+                item.setForeground(color)
+
     def on_pots_update(self, pots_list):
         if isinstance(pots_list, list):
             formatted = "  |  ".join([f"{v}" for v in pots_list])
@@ -1,6 +1,7 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QDoubleSpinBox, QGroupBox, QComboBox)
 from PyQt6.QtCore import Qt
+from core.config_manager import config_manager
 
 class IKPanel(QWidget):
     """
@@ -59,6 +60,26 @@ class IKPanel(QWidget):
             
         layout.addWidget(coord_group)
         
+        # --- SOLVER ---
+        solver_group = QGroupBox("Solver")
+        solver_group.setStyleSheet("QGroupBox { border: 1px solid #3e3e42; font-weight: bold; margin-top: 10px; } QGroupBox::title { color: #ccc; }")
+        sv_layout = QVBoxLayout(solver_group)
+        
+        self.cb_solver = QComboBox()
+        self.cb_solver.setStyleSheet("padding: 5px; background: #333; color: #fff;")
+        self.cb_solver.addItem("CCD (Cyclic Coordinate Descent)", "ccd")
+        self.cb_solver.addItem("DLS (Damped Least Squares)", "dls")
+        idx = self.cb_solver.findData(config_manager.get("ik_solver") or "ccd")
+        self.cb_solver.setCurrentIndex(max(0, idx))
+        self.cb_solver.currentIndexChanged.connect(lambda _: config_manager.set("ik_solver", self.cb_solver.currentData()))
+        sv_layout.addWidget(self.cb_solver)
+        
+        self.lbl_result = QLabel("")
+        self.lbl_result.setStyleSheet("color: #aaa; font-size: 9pt;")
+        sv_layout.addWidget(self.lbl_result)
+        
+        layout.addWidget(solver_group)
+        
         # --- ACTION ---
         btn_solve = QPushButton("SOLVE & MOVE")
         btn_solve.setMinimumHeight(40)
@@ -104,19 +125,17 @@ class IKPanel(QWidget):
         link_name = self.cb_links.currentText()
         if not link_name or not self.kinematics: return
         
-        if link_name in self.kinematics.ghost_nodes:
-            node = self.kinematics.ghost_nodes[link_name]
-            # Get absolute position (0,0,0 local mapped to world)
-            from PyQt6.QtGui import QVector3D
-            pos = node.transform().map(QVector3D(0,0,0))
-            
-            self.inputs[0].setValue(pos.x())
-            self.inputs[1].setValue(pos.y())
-            self.inputs[2].setValue(pos.z())
+        pos = self.kinematics.link_position(link_name, ghost=True)
+        if pos is not None:
+            for spin, v in zip(self.inputs, pos):
+                spin.setValue(v)
 
     def _solve(self):
         link_name = self.cb_links.currentText()
         coords = [s.value() for s in self.inputs]
         
         if self.kinematics:
-            self.kinematics.solve_ik(coords, link_name)
\ No newline at end of file
+            result = self.kinematics.solve_ik(coords, link_name, solver=self.cb_solver.currentData())
+            if result:
+                status = "Converged" if result["converged"] else "Not converged"
+                self.lbl_result.setText(f"{status}: {result['iterations']} iterations, residual {result['residual']:.1f} mm")
\ No newline at end of file
@@ -1,11 +1,14 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
-                             QPushButton, QListWidget, QCheckBox, QFileDialog, QLabel, QFrame)
+                             QPushButton, QListWidget, QCheckBox, QFileDialog, QLabel, QFrame,
+                             QMessageBox)
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QColor, QBrush
 import json
 import math
 import os
 from core.theme_manager import theme_manager
+from core.config_manager import config_manager
+from solver import TrajectoryValidator, complete_frames
 from ui.widgets.custom_icons import ModernSidebarButton
 
 class SequencerPanel(QWidget):
@@ -13,6 +16,7 @@ class SequencerPanel(QWidget):
         super().__init__(parent_window)
         self.kinematics = kinematics
         self.frames = []
+        self.play_frames = []  # frames with omitted joints filled in at play start
         self.is_playing = False
         
         self.current_frame_idx = 0
@@ -21,6 +25,7 @@ class SequencerPanel(QWidget):
         
         self.timer = QTimer()
         self.timer.timeout.connect(self._tick)
+        self.validator = TrajectoryValidator(kinematics) if kinematics else None
         
         self._setup_ui()
         theme_manager.theme_changed.connect(self.update_theme)
@@ -151,6 +156,9 @@ class SequencerPanel(QWidget):
 
     def _toggle_play(self):
         if not self.frames: return
+        if not self.is_playing:
+            self.play_frames = complete_frames(self.frames, self.kinematics.current_state, self.kinematics.joint_order)
+            if not self._validate_sequence(): return
         
         self.is_playing = not self.is_playing
         if self.is_playing:
@@ -172,6 +180,26 @@ class SequencerPanel(QWidget):
             self.btn_rec.setEnabled(True)
             self.btn_clear.setEnabled(True)
 
+    def _validate_sequence(self):
+        """Checks the whole animation for self-collision before playback. Returns True to play."""
+        if not self.validator or not config_manager.get("safety_collision_enabled"): return True
+        
+        # Playback loops, so the wrap from the last frame to the first is checked too
+        result = self.validator.validate(self.play_frames, smooth=self.chk_smooth.isChecked(), loop=True)
+        if result["ok"]: return True
+        
+        seg = result["segment"]
+        self.list_frames.setCurrentRow(seg)
+        a, b = result["links"]
+        nxt = (seg + 1) % len(self.play_frames)
+        where = f"Frame {seg + 1:02d} -> {nxt + 1:02d} at {result['t'] * 100:.0f}%" if self.chk_smooth.isChecked() else f"Frame {seg + 1:02d}"
+        reply = QMessageBox.warning(
+            self, "Collision Detected",
+            f"{a} hits {b}\n{where}\n\nPlay anyway?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No)
+        return reply == QMessageBox.StandardButton.Yes
+
     def _clear(self):
         self.frames.clear()
         self.list_frames.clear()
@@ -181,13 +209,15 @@ class SequencerPanel(QWidget):
 
     def _tick(self):
         # (Same interpolation logic as before)
-        if not self.frames: return
-        if self.current_frame_idx >= len(self.frames) - 1:
+        frames = self.play_frames
+        if not frames: return
+        # The last frame eases back into the first, as validated
+        if self.current_frame_idx >= len(frames):
             self.current_frame_idx = 0
             
-        start_frame = self.frames[self.current_frame_idx]
-        next_idx = (self.current_frame_idx + 1) % len(self.frames)
-        end_frame = self.frames[next_idx]
+        start_frame = frames[self.current_frame_idx]
+        next_idx = (self.current_frame_idx + 1) % len(frames)
+        end_frame = frames[next_idx]
         
         t = self.sub_step / self.total_steps
         self.list_frames.setCurrentRow(self.current_frame_idx)
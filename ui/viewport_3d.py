@@ -45,6 +45,7 @@ class Viewport3D(QWidget):
             self.view_widget.mousePressEvent = self.on_mouse_press
             self.view_widget.mouseMoveEvent = self.on_mouse_move
             self.view_widget.mouseReleaseEvent = self.on_mouse_release
+            self.view_widget.wheelEvent = self.on_wheel
             self.view_widget.keyPressEvent = self.keyPressEvent
 
             grid = gl.GLGridItem()
@@ -138,20 +139,29 @@ class Viewport3D(QWidget):
     def reset_view(self):
         if self.view_widget:
             self.view_widget.setCameraPosition(pos=QVector3D(0,0,0), distance=1000, elevation=30, azimuth=45)
+            self._update_lod()
 
     def zoom_in(self):
         if self.view_widget:
             self.view_widget.opts['distance'] *= 0.8
+            self._update_lod()
             self.view_widget.update()
 
     def zoom_out(self):
         if self.view_widget:
             self.view_widget.opts['distance'] *= 1.2
+            self._update_lod()
             self.view_widget.update()
 
     def set_angle(self, azimuth, elevation):
         if self.view_widget:
             self.view_widget.setCameraPosition(pos=QVector3D(0,0,0), distance=1000, elevation=elevation, azimuth=azimuth)
+            self._update_lod()
+
+    def _update_lod(self):
+        """Picks mesh detail from the camera distance (coarser when zoomed out)."""
+        if self.kinematics and self.view_widget:
+            self.kinematics.apply_lod(self.view_widget.opts['distance'])
 
     def update_hud_theme(self):
         p = theme_manager.active_palette
@@ -210,9 +220,9 @@ class Viewport3D(QWidget):
 
     def _update_gizmo_pos(self):
         if not self.selected_link_name or not self.kinematics: return
-        if self.selected_link_name in self.kinematics.scene_nodes:
-            mesh = self.kinematics.scene_nodes[self.selected_link_name]
-            self.gizmo_item.setTransform(mesh.transform())
+        matrix = self.kinematics.link_matrix(self.selected_link_name)
+        if matrix is not None:
+            self.gizmo_item.setTransform(matrix)
 
     def keyPressEvent(self, event):
         if not self.selected_link_name:
@@ -246,6 +256,10 @@ class Viewport3D(QWidget):
         else:
             gl.GLViewWidget.mouseMoveEvent(self.view_widget, ev)
 
+    def on_wheel(self, ev):
+        gl.GLViewWidget.wheelEvent(self.view_widget, ev)
+        self._update_lod()
+
     def on_mouse_release(self, ev):
         self.last_mouse_pos = None
         gl.GLViewWidget.mouseReleaseEvent(self.view_widget, ev)
\ No newline at end of file